@@ -0,0 +1,67 @@
+"""
+Academic year cache
+The academic_years table changes about once a year, so it is loaded once at
+startup and kept in memory (see cache.TableCache), reloaded when older than
+ACADEMIC_YEAR_CACHE_TTL or after invalidate(). Lookups such as the current
+year are plain in-memory reads, so any router can use them for defaults.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+from cache import TableCache, supabase
+
+logger = logging.getLogger(__name__)
+
+ACADEMIC_YEARS_TABLE = "academic_years"
+CACHE_TTL = int(os.getenv("ACADEMIC_YEAR_CACHE_TTL", "3600"))
+
+# Used when the table is empty or unreachable
+FALLBACK_YEAR = os.getenv("DEFAULT_ACADEMIC_YEAR", "2024-25")
+
+
+class AcademicYearCache(TableCache):
+    """All academic_years rows, newest year first"""
+
+    table = ACADEMIC_YEARS_TABLE
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._current: Optional[Dict[str, Any]] = None
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        return supabase.table(self.table).select("*").order("year_name", desc=True).execute().data or []
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        active = [year for year in rows if year.get("is_active", True)]
+        self._by_name = {year["year_name"]: year for year in rows}
+        # Flagged current year, else the most recent active one
+        self._current = next((year for year in rows if year.get("is_current")), active[0] if active else None)
+
+    def all(self, active_only: bool = True) -> List[Dict[str, Any]]:
+        self.fresh()
+        if active_only:
+            return [year for year in self.rows if year.get("is_active", True)]
+        return list(self.rows)
+
+    def get(self, year_name: str) -> Optional[Dict[str, Any]]:
+        self.fresh()
+        return self._by_name.get(year_name)
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        self.fresh()
+        return self._current
+
+    def current_year_name(self, default: str = FALLBACK_YEAR) -> str:
+        """Name of the current year for defaults; never raises"""
+        try:
+            current = self.current()
+        except Exception as e:
+            logger.warning(f"Academic years unavailable, using {default}: {e}")
+            current = None
+        return current["year_name"] if current else default
+
+
+academic_year_cache = AcademicYearCache()
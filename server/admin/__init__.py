@@ -6,5 +6,6 @@ from .routes import router as admin_router
 from .schema import get_admin_schema
 from .auth_routes import router as auth_router
 from .auth_schema import get_auth_schema
+from .notices_feed import router as notices_router, notices_cache
 
-__all__ = ["admin_router", "get_admin_schema", "auth_router", "get_auth_schema"]
+__all__ = ["admin_router", "get_admin_schema", "auth_router", "get_auth_schema", "notices_router", "notices_cache"]
@@ -195,6 +195,22 @@ async def get_current_user(
     logger.debug(f"Verifying token from {'cookie' if auth_token else 'header'}")
     return verify_token(token)
 
+async def get_optional_user(
+    auth_token: Optional[str] = Cookie(None, alias="auth_token"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Security(security)
+) -> Optional[TokenData]:
+    """
+    Like get_current_user, but returns None instead of raising
+    For routes that record who acted when known (e.g. media uploader) without requiring login
+    """
+    token = auth_token or (credentials.credentials if credentials else None)
+    if not token:
+        return None
+    try:
+        return verify_token(token)
+    except HTTPException:
+        return None
+
 async def require_admin(current_user: TokenData = Depends(get_current_user)) -> TokenData:
     """
     Dependency to require admin role
@@ -0,0 +1,248 @@
+"""
+Public Notices Feed
+Read-only notices for the website and notice boards (no authentication).
+Notices are served from an in-memory cache that create_notice/update_notice
+invalidate. Atom and RSS renderings are kept as prebuilt bytes with an ETag,
+one per feed and day. Links point at SERVER_URL when it is set; otherwise a
+placeholder in the cached bytes is replaced with the request's base URL, so
+client-supplied Host headers never add cache entries.
+"""
+
+import os
+import base64
+import hashlib
+import binascii
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cache import TableCache, supabase
+from serialization import FastJSONResponse
+
+NOTICES_TABLE = "notices"
+CACHE_TTL = int(os.getenv("NOTICES_CACHE_TTL", "300"))
+FEED_TITLE = os.getenv("NOTICES_FEED_TITLE", "School Notices")
+
+# Drafts are never public
+HIDDEN_STATUS = "draft"
+
+# Base URL of this router in feed links (…/api/notices)
+FEED_BASE_URL = f"{os.getenv('SERVER_URL').rstrip('/')}/api/notices" if os.getenv("SERVER_URL") else None
+FEED_BASE_PLACEHOLDER = "{{feed_base}}"
+FEED_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+router = APIRouter(prefix="/api/notices", tags=["notices"])
+
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[str, int]:
+    return (str(row.get("created_at") or ""), int(row["id"]))
+
+
+def _is_public(row: Dict[str, Any], today: str) -> bool:
+    if (row.get("status") or HIDDEN_STATUS) == HIDDEN_STATUS:
+        return False
+    expiry = row.get("expiry_date")
+    return not expiry or str(expiry)[:10] >= today
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    created_at, notice_id = _sort_key(row)
+    return base64.urlsafe_b64encode(f"{created_at}|{notice_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, notice_id = raw.rsplit("|", 1)
+        return created_at, int(notice_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class NoticesCache(TableCache):
+    """
+    All notices (drafts included, for the admin list). Public views are
+    derived per (day, status, category) on first use and kept until the next
+    reload, since expiry is date based.
+    """
+
+    table = NOTICES_TABLE
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self._views: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[List[Tuple[str, int]], List[Dict[str, Any]]]] = {}
+        self._feeds: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        return supabase.table(self.table).select("*").order("created_at", desc=True).execute().data or []
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        self._views = {}
+        self._feeds = {}
+
+    def public(self, status: Optional[str] = None, category: Optional[str] = None) -> Tuple[List[Tuple[str, int]], List[Dict[str, Any]]]:
+        """(sort keys, rows) of visible notices, oldest first"""
+        self.fresh()
+        today = date.today().isoformat()
+        key = (today, status, category)
+        view = self._views.get(key)
+        if view is None:
+            rows = sorted(
+                (
+                    row for row in self.rows
+                    if _is_public(row, today)
+                    and (not status or row.get("status") == status)
+                    and (not category or row.get("category") == category)
+                ),
+                key=_sort_key,
+            )
+            view = ([_sort_key(row) for row in rows], rows)
+            self._views[key] = view
+        return view
+
+    def page(self, limit: int, cursor: Optional[str] = None, status: Optional[str] = None,
+             category: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first page of notices older than the cursor, plus the next cursor"""
+        keys, rows = self.public(status, category)
+        end = bisect_left(keys, decode_cursor(cursor)) if cursor else len(rows)
+        start = max(0, end - limit)
+        items = rows[start:end][::-1]
+        next_cursor = encode_cursor(items[-1]) if items and start > 0 else None
+        return items, next_cursor
+
+    def feed(self, kind: str) -> Tuple[bytes, str]:
+        """
+        Prebuilt (body, etag) for the Atom or RSS feed. Without SERVER_URL the
+        body contains FEED_BASE_PLACEHOLDER in place of the base URL.
+        """
+        _, rows = self.public()
+        key = (kind, date.today().isoformat())
+        cached = self._feeds.get(key)
+        if cached is None:
+            latest = rows[-FEED_SIZE:][::-1]
+            self_url = f"{FEED_BASE_URL or FEED_BASE_PLACEHOLDER}/{kind}.xml"
+            body = (render_atom if kind == "atom" else render_rss)(latest, self_url)
+            cached = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+            self._feeds[key] = cached
+        return cached
+
+
+def _timestamp(value: Any) -> datetime:
+    """Notice timestamps are stored without a zone (UTC)"""
+    if not value:
+        return datetime.now(timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _notice_url(self_url: str, row: Dict[str, Any]) -> str:
+    return self_url.rsplit("/", 1)[0] + f"?notice={row['id']}"
+
+
+def render_atom(rows: List[Dict[str, Any]], self_url: str) -> bytes:
+    updated = max((_timestamp(row.get("updated_at") or row.get("created_at")) for row in rows),
+                  default=datetime.now(timezone.utc))
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(FEED_TITLE)}</title>\n",
+        f'<link rel="self" href="{escape(self_url)}"/>\n',
+        f"<id>{escape(self_url)}</id>\n",
+        f"<updated>{updated.isoformat()}</updated>\n",
+    ]
+    for row in rows:
+        parts.append(
+            "<entry>\n"
+            f"<title>{escape(row.get('title') or '')}</title>\n"
+            f"<id>urn:notice:{row['id']}</id>\n"
+            f'<link href="{escape(_notice_url(self_url, row))}"/>\n'
+            f"<published>{_timestamp(row.get('created_at')).isoformat()}</published>\n"
+            f"<updated>{_timestamp(row.get('updated_at') or row.get('created_at')).isoformat()}</updated>\n"
+            + (f'<category term="{escape(row["category"])}"/>\n' if row.get("category") else "")
+            + (f"<author><name>{escape(row['published_by'])}</name></author>\n" if row.get("published_by") else "")
+            + f'<content type="text">{escape(row.get("content") or "")}</content>\n'
+            "</entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def render_rss(rows: List[Dict[str, Any]], self_url: str) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<rss version="2.0"><channel>\n',
+        f"<title>{escape(FEED_TITLE)}</title>\n",
+        f"<link>{escape(self_url)}</link>\n",
+        f"<description>{escape(FEED_TITLE)}</description>\n",
+    ]
+    for row in rows:
+        parts.append(
+            "<item>\n"
+            f"<title>{escape(row.get('title') or '')}</title>\n"
+            f"<link>{escape(_notice_url(self_url, row))}</link>\n"
+            f'<guid isPermaLink="false">urn:notice:{row["id"]}</guid>\n'
+            f"<pubDate>{format_datetime(_timestamp(row.get('created_at')))}</pubDate>\n"
+            + (f"<category>{escape(row['category'])}</category>\n" if row.get("category") else "")
+            + f"<description>{escape(row.get('content') or '')}</description>\n"
+            "</item>\n"
+        )
+    parts.append("</channel></rss>\n")
+    return "".join(parts).encode("utf-8")
+
+
+notices_cache = NoticesCache()
+
+
+def _check_loaded():
+    try:
+        notices_cache.fresh()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Notices unavailable")
+
+
+@router.get("")
+async def list_public_notices(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """
+    Published notices, newest first (public)
+    Pass next_cursor from the previous page as cursor to continue.
+    """
+    _check_loaded()
+    items, next_cursor = notices_cache.page(limit, cursor, status, category)
+    return FastJSONResponse({"notices": items, "next_cursor": next_cursor, "limit": limit})
+
+
+def _feed_response(request: Request, kind: str, media_type: str) -> Response:
+    _check_loaded()
+    body, etag = notices_cache.feed(kind)
+    if not FEED_BASE_URL:
+        base = str(request.url.replace(query="")).rsplit("/", 1)[0]
+        body = body.replace(FEED_BASE_PLACEHOLDER.encode(), escape(base).encode())
+        etag = '"' + hashlib.sha1((etag + base).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.get("/atom.xml")
+async def notices_atom(request: Request):
+    """Atom feed of the latest published notices (public)"""
+    return _feed_response(request, "atom", "application/atom+xml; charset=utf-8")
+
+
+@router.get("/rss.xml")
+async def notices_rss(request: Request):
+    """RSS 2.0 feed of the latest published notices (public)"""
+    return _feed_response(request, "rss", "application/rss+xml; charset=utf-8")
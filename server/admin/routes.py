@@ -13,6 +13,8 @@ from decimal import Decimal
 
 # Import authentication utilities
 from .auth_utils import get_current_user, require_admin, TokenData
+from school_settings import settings_cache
+from .notices_feed import notices_cache
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -395,6 +397,7 @@ async def create_notice(
     db = get_supabase()
     
     result = db.table("notices").insert(notice.model_dump()).execute()
+    notices_cache.invalidate()
     return {"success": True, "notice": result.data[0]}
 
 @router.put("/notices/{notice_id}")
@@ -408,6 +411,7 @@ async def update_notice(
     
     update_data = {k: v for k, v in notice.model_dump().items() if v is not None}
     result = db.table("notices").update(update_data).eq("id", notice_id).execute()
+    notices_cache.invalidate()
     return {"success": True, "notice": result.data[0]}
 
 # ============= SETTINGS ROUTES =============
@@ -415,17 +419,19 @@ async def update_notice(
 @router.get("/settings")
 async def get_settings(
     category: Optional[str] = None,
+    grouped: bool = False,
     current_user: TokenData = Depends(get_current_user)
 ):
-    """Get all settings (requires authentication)"""
-    db = get_supabase()
-    
-    query = db.table("school_settings").select("*")
-    if category:
-        query = query.eq("category", category)
+    """Get all settings, optionally as {category: {key: value}} (requires authentication)"""
+    get_supabase()
     
-    result = query.execute()
-    return {"settings": result.data}
+    # Served from the in-memory settings cache
+    if grouped:
+        categories = settings_cache.grouped()
+        if category:
+            categories = {category: categories.get(category, {})}
+        return {"categories": categories}
+    return {"settings": settings_cache.all(category)}
 
 @router.put("/settings/{setting_key}")
 async def update_setting(
@@ -442,6 +448,7 @@ async def update_setting(
         "updated_at": datetime.now().isoformat()
     }, on_conflict="setting_key").execute()
     
+    settings_cache.apply(result.data[0])
     return {"success": True, "setting": result.data[0]}
 
 # ============= ADMISSION APPLICATION ROUTES =============
@@ -11,13 +11,18 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
-from supabase import create_client, Client
 
 # Import authentication utilities
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from admin.auth_utils import get_current_user, require_admin, TokenData
 from security import check_rate_limit
+from jobs import job_queue
+from periodic import periodic
+from notifications import notify_admins
+from exports import csv_response, iter_keyset
+from mappers import RowMapper
+from serialization import FastJSONResponse
 
 from .schemas import (
     ApplicationCreate,
@@ -29,14 +34,20 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 # Table name from setup script
 TABLE_NAME = "applications"
 
+EXPORT_COLUMNS = [
+    "id", "student_name", "parent_name", "email", "phone", "grade_applying",
+    "date_of_birth", "address", "previous_school", "notes", "status", "created_at", "updated_at",
+]
+
+# Rows -> ApplicationResponse dicts
+application_rows = RowMapper(ApplicationResponse, text_fields=("date_of_birth",))
+
 applications_router = APIRouter(prefix="/api/applications", tags=["Applications"])
 
 
@@ -46,6 +57,21 @@ def check_supabase():
         raise HTTPException(status_code=503, detail="Database not connected")
 
 
+# Stats snapshot, refreshed by a background job after every write and periodically
+# (the periodic refresh keeps every worker current, not just the one that wrote)
+STATS_REFRESH_INTERVAL = int(os.getenv("STATS_REFRESH_INTERVAL", "300"))
+_stats_snapshot = {"pending_count": None}
+
+
+@job_queue.handler("applications.refresh_stats")
+@periodic.every(STATS_REFRESH_INTERVAL, "applications.refresh_stats")
+def refresh_application_stats(payload: Optional[dict] = None) -> int:
+    """Recount pending applications into the stats snapshot"""
+    result = supabase.table(TABLE_NAME).select("id", count="exact").eq("status", "pending").execute()
+    _stats_snapshot["pending_count"] = result.count or 0
+    return _stats_snapshot["pending_count"]
+
+
 def sanitize_search(search: str) -> str:
     """
     Sanitize search parameter to prevent SQL injection via PostgREST
@@ -56,6 +82,26 @@ def sanitize_search(search: str) -> str:
     return sanitized.strip()
 
 
+def apply_application_filters(query, status: Optional[str], grade: Optional[str], search: Optional[str]):
+    """Filters shared by the list and export endpoints"""
+    if status:
+        query = query.eq("status", status)
+    
+    if grade:
+        # Sanitize grade parameter
+        safe_grade = sanitize_search(grade)
+        if safe_grade:
+            query = query.ilike("grade_applying", f"%{safe_grade}%")
+    
+    if search:
+        # Sanitize search parameter
+        safe_search = sanitize_search(search)
+        if safe_search:
+            query = query.or_(f"student_name.ilike.%{safe_search}%,parent_name.ilike.%{safe_search}%,email.ilike.%{safe_search}%")
+    
+    return query
+
+
 @applications_router.get("/stats")
 async def get_application_stats(
     current_user: TokenData = Depends(get_current_user)
@@ -66,8 +112,10 @@ async def get_application_stats(
     check_supabase()
     
     try:
-        result = supabase.table(TABLE_NAME).select("id", count="exact").eq("status", "pending").execute()
-        return {"pending_count": result.count or 0}
+        count = _stats_snapshot["pending_count"]
+        if count is None:
+            count = refresh_application_stats()
+        return {"pending_count": count}
     except Exception as e:
         logger.error(f"Error getting application stats: {e}")
         return {"pending_count": 0}
@@ -92,20 +140,7 @@ async def list_applications(
         query = supabase.table(TABLE_NAME).select("*", count="exact")
         
         # Apply filters
-        if status:
-            query = query.eq("status", status)
-        
-        if grade:
-            # Sanitize grade parameter
-            safe_grade = sanitize_search(grade)
-            if safe_grade:
-                query = query.ilike("grade_applying", f"%{safe_grade}%")
-        
-        if search:
-            # Sanitize search parameter
-            safe_search = sanitize_search(search)
-            if safe_search:
-                query = query.or_(f"student_name.ilike.%{safe_search}%,parent_name.ilike.%{safe_search}%,email.ilike.%{safe_search}%")
+        query = apply_application_filters(query, status, grade, search)
         
         # Apply pagination
         offset = (page - 1) * page_size
@@ -116,36 +151,40 @@ async def list_applications(
         
         result = query.execute()
         
-        # Format response
-        applications = []
-        for app in result.data:
-            applications.append({
-                "id": app["id"],
-                "student_name": app["student_name"],
-                "parent_name": app["parent_name"],
-                "email": app["email"],
-                "phone": app["phone"],
-                "grade_applying": app["grade_applying"],
-                "date_of_birth": str(app["date_of_birth"]) if app.get("date_of_birth") else None,
-                "address": app.get("address"),
-                "previous_school": app.get("previous_school"),
-                "notes": app.get("notes"),
-                "status": app.get("status", "pending"),
-                "created_at": app.get("created_at"),
-                "updated_at": app.get("updated_at"),
-            })
-        
-        return ApplicationListResponse(
-            applications=applications,
-            total=result.count or len(result.data),
-            page=page,
-            page_size=page_size
-        )
+        # Rows are mapped to the ApplicationResponse shape, so skip re-validating them
+        return FastJSONResponse({
+            "applications": application_rows.many(result.data),
+            "total": result.count or len(result.data),
+            "page": page,
+            "page_size": page_size
+        })
     except Exception as e:
         logger.error(f"Error listing applications: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch applications: {str(e)}")
 
 
+@applications_router.get("/export")
+async def export_applications(
+    status: Optional[str] = Query(None),
+    grade: Optional[str] = Query(None),
+    search: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Export applications as CSV (requires authentication, same filters as the list endpoint)
+    """
+    check_supabase()
+    
+    try:
+        rows = iter_keyset(lambda: apply_application_filters(
+            supabase.table(TABLE_NAME).select(",".join(EXPORT_COLUMNS)), status, grade, search
+        ))
+        return csv_response("applications", EXPORT_COLUMNS, rows)
+    except Exception as e:
+        logger.error(f"Error exporting applications: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to export applications: {str(e)}")
+
+
 @applications_router.get("/{application_id}", response_model=ApplicationResponse)
 async def get_application(application_id: str):
     """
@@ -159,22 +198,7 @@ async def get_application(application_id: str):
         if not result.data:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        app = result.data
-        return {
-            "id": app["id"],
-            "student_name": app["student_name"],
-            "parent_name": app["parent_name"],
-            "email": app["email"],
-            "phone": app["phone"],
-            "grade_applying": app["grade_applying"],
-            "date_of_birth": str(app["date_of_birth"]) if app.get("date_of_birth") else None,
-            "address": app.get("address"),
-            "previous_school": app.get("previous_school"),
-            "notes": app.get("notes"),
-            "status": app.get("status", "pending"),
-            "created_at": app.get("created_at"),
-            "updated_at": app.get("updated_at"),
-        }
+        return FastJSONResponse(application_rows.one(result.data))
     except HTTPException:
         raise
     except Exception as e:
@@ -216,21 +240,17 @@ async def create_application(application: ApplicationCreate, request: Request):
             raise HTTPException(status_code=500, detail="Failed to create application")
         
         created = result.data[0]
-        return {
-            "id": created["id"],
-            "student_name": created["student_name"],
-            "parent_name": created["parent_name"],
-            "email": created["email"],
-            "phone": created["phone"],
-            "grade_applying": created["grade_applying"],
-            "date_of_birth": str(created["date_of_birth"]) if created.get("date_of_birth") else None,
-            "address": created.get("address"),
-            "previous_school": created.get("previous_school"),
-            "notes": created.get("notes"),
-            "status": created.get("status", "pending"),
-            "created_at": created.get("created_at"),
-            "updated_at": created.get("updated_at"),
-        }
+        
+        # Email + stats refresh run after the response
+        notify_admins(f"New admission application: {created['student_name']}", {
+            "Student": created["student_name"],
+            "Parent": created["parent_name"],
+            "Grade": created["grade_applying"],
+            "Email": created["email"],
+            "Phone": created["phone"],
+        })
+        job_queue.enqueue("applications.refresh_stats")
+        return FastJSONResponse(application_rows.one(created), status_code=201)
     except HTTPException:
         raise
     except Exception as e:
@@ -284,22 +304,11 @@ async def update_application(application_id: str, application: ApplicationUpdate
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update application")
         
+        if "status" in data:
+            job_queue.enqueue("applications.refresh_stats")
+        
         updated = result.data[0]
-        return {
-            "id": updated["id"],
-            "student_name": updated["student_name"],
-            "parent_name": updated["parent_name"],
-            "email": updated["email"],
-            "phone": updated["phone"],
-            "grade_applying": updated["grade_applying"],
-            "date_of_birth": str(updated["date_of_birth"]) if updated.get("date_of_birth") else None,
-            "address": updated.get("address"),
-            "previous_school": updated.get("previous_school"),
-            "notes": updated.get("notes"),
-            "status": updated.get("status", "pending"),
-            "created_at": updated.get("created_at"),
-            "updated_at": updated.get("updated_at"),
-        }
+        return FastJSONResponse(application_rows.one(updated))
     except HTTPException:
         raise
     except Exception as e:
@@ -327,6 +336,8 @@ async def update_application_status(application_id: str, status: str = Query(...
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", application_id).execute()
         
+        job_queue.enqueue("applications.refresh_stats")
+        
         return {"message": f"Application status updated to {status}", "id": application_id, "status": status}
     except HTTPException:
         raise
@@ -348,6 +359,7 @@ async def delete_application(application_id: str):
             raise HTTPException(status_code=404, detail="Application not found")
         
         supabase.table(TABLE_NAME).delete().eq("id", application_id).execute()
+        job_queue.enqueue("applications.refresh_stats")
         
         return {"message": "Application deleted successfully", "id": application_id}
     except HTTPException:
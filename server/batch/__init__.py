@@ -0,0 +1,6 @@
+"""
+Batch module
+"""
+from .router import batch_router
+
+__all__ = ["batch_router"]
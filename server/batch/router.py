@@ -0,0 +1,118 @@
+"""
+Batch API Router
+Runs several read (GET) requests against the existing routers in one call,
+so admin screens can load a class with its students, exams and counters
+without a browser round trip per request. Sub-requests run on the server's
+own event loop as part of the outer request (sync handlers still get
+threadpool threads, so their PostgREST round trips overlap).
+Requires authentication
+"""
+import os
+import time
+import asyncio
+import logging
+
+import httpx
+from fastapi import APIRouter, HTTPException, Depends, Request
+
+# Import authentication utilities
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from admin.auth_utils import get_current_user, TokenData
+from security import get_client_ip
+from lifecycle import nested_request
+
+from .schemas import BatchRequest, BatchResponse, BatchResult, BatchSubRequest
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Sub-requests running at the same time per batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "6"))
+SUB_REQUEST_TIMEOUT = 30
+
+# Headers forwarded so sub-requests authenticate as the caller
+FORWARDED_HEADERS = ("cookie", "authorization", "accept-language")
+
+batch_router = APIRouter(prefix="/api/batch", tags=["Batch"])
+
+
+def validate_path(path: str) -> str:
+    """Only allow reads against /api routes (no nesting, no streaming exports)"""
+    route = path.split("?", 1)[0]
+    if not route.startswith("/api/") or ".." in route:
+        raise HTTPException(status_code=400, detail=f"Invalid batch path: {path}")
+    if route.startswith("/api/batch") or route.endswith("/export") or route.endswith("/download"):
+        raise HTTPException(status_code=400, detail=f"Path not allowed in a batch: {path}")
+    return path
+
+
+async def _dispatch(client: httpx.AsyncClient, sub: BatchSubRequest, headers: dict) -> BatchResult:
+    start = time.perf_counter()
+    response = await asyncio.wait_for(client.get(sub.path, params=sub.query, headers=headers), SUB_REQUEST_TIMEOUT)
+
+    if "application/json" in response.headers.get("content-type", ""):
+        body = response.json()
+    else:
+        body = response.text
+
+    return BatchResult(
+        id=sub.id,
+        path=sub.path,
+        status=response.status_code,
+        body=body,
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+@batch_router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Run up to 20 GET sub-requests concurrently and return all results in order
+
+    Example body:
+        { "requests": [
+            { "id": "class", "path": "/api/classes/<id>" },
+            { "id": "students", "path": "/api/classes/<id>/students", "query": { "page_size": 100 } },
+            { "id": "exams", "path": "/api/exams", "query": { "grade": "10" } }
+        ] }
+
+    Each result carries the sub-request's own status code; one failing
+    sub-request does not fail the batch.
+    """
+    start = time.perf_counter()
+    for sub in batch.requests:
+        validate_path(sub.path)
+
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    # Sub-requests are rate limited and logged as the real client
+    client_ip = get_client_ip(request)
+    headers["x-forwarded-for"] = client_ip
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    transport = httpx.ASGITransport(app=request.app, client=(client_ip, request.client.port if request.client else 0))
+
+    async def run_one(client: httpx.AsyncClient, sub: BatchSubRequest) -> BatchResult:
+        async with semaphore:
+            try:
+                return await _dispatch(client, sub, headers)
+            except Exception as e:
+                logger.error(f"Batch sub-request {sub.path} failed: {e!r}")
+                return BatchResult(id=sub.id, path=sub.path, status=500,
+                                   body={"detail": "Internal server error"}, duration_ms=0)
+
+    token = nested_request.set(True)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+            results = await asyncio.gather(*(run_one(client, sub) for sub in batch.requests))
+    finally:
+        nested_request.reset(token)
+
+    return BatchResponse(
+        results=results,
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
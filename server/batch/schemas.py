@@ -0,0 +1,34 @@
+"""
+Batch API Pydantic schemas
+"""
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+MAX_BATCH_SIZE = 20
+
+
+class BatchSubRequest(BaseModel):
+    """A single read request against an existing /api route"""
+    id: Optional[str] = None  # Echoed back so clients can match results
+    path: str = Field(..., min_length=1, max_length=500)  # e.g. /api/classes/<id>/students
+    query: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    """Schema for a batch of read requests"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchResult(BaseModel):
+    """Result of one sub-request"""
+    id: Optional[str] = None
+    path: str
+    status: int
+    body: Any = None
+    duration_ms: float
+
+
+class BatchResponse(BaseModel):
+    """Schema for batch results (same order as the request)"""
+    results: List[BatchResult]
+    duration_ms: float
@@ -0,0 +1,197 @@
+"""
+Bulk import utilities
+Streaming CSV/NDJSON parsing, chunking and per-row error reporting shared by
+the student, teacher and class import endpoints.
+"""
+
+import io
+import csv
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Rows per insert/upsert request (keeps PostgREST payloads well under limits)
+BATCH_SIZE = 500
+# Values per `in` filter (keeps GET URLs short)
+LOOKUP_CHUNK_SIZE = 200
+MAX_IMPORT_ROWS = 10000
+
+
+class ImportRowError(BaseModel):
+    """Error for a single input row (row numbers are 1-based data rows)"""
+    row: int
+    key: Optional[str] = None
+    error: str
+
+
+class ImportSummary(BaseModel):
+    """Result of a bulk import"""
+    total: int
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    dry_run: bool = False
+    errors: List[ImportRowError] = []
+
+
+def detect_format(file: UploadFile, format: Optional[str]) -> str:
+    """Resolve 'csv' or 'ndjson' from an explicit value, content type or filename"""
+    if format:
+        fmt = format.lower()
+    elif file.content_type in ("application/x-ndjson", "application/jsonl", "application/json"):
+        fmt = "ndjson"
+    elif (file.filename or "").lower().endswith((".ndjson", ".jsonl")):
+        fmt = "ndjson"
+    else:
+        fmt = "csv"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Unsupported format. Use csv or ndjson")
+    return fmt
+
+
+def _clean_csv_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim values, drop empty cells and decode JSON object cells"""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue  # extra cells without a header
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                continue
+            if value.startswith("{") and value.endswith("}"):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+        cleaned[key] = value
+    return cleaned
+
+
+def iter_upload_rows(file: UploadFile, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream rows from an uploaded file without reading it into memory.
+    Yields (row_number, dict) - or (row_number, Exception) for unparsable NDJSON lines.
+    """
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for row_number, row in enumerate(csv.DictReader(text), start=1):
+                yield row_number, _clean_csv_row(row)
+        else:
+            row_number = 0
+            for line in text:
+                line = line.strip()
+                if not line:
+                    continue
+                row_number += 1
+                try:
+                    value = json.loads(line)
+                    if not isinstance(value, dict):
+                        raise ValueError("Each line must be a JSON object")
+                    yield row_number, value
+                except ValueError as e:
+                    yield row_number, e
+    finally:
+        text.detach()
+
+
+def iter_model_rows(file: UploadFile, fmt: str, model: type, extras_field: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Parsed import rows for a model. When extras_field is given, columns that are
+    not model fields (or aliases) are folded into that JSON field.
+    """
+    known = set(model.model_fields)
+    known.update(f.alias for f in model.model_fields.values() if f.alias)
+    for row_number, row in iter_upload_rows(file, fmt):
+        if extras_field and isinstance(row, dict):
+            extra = {key: row.pop(key) for key in list(row) if key not in known}
+            if extra:
+                row[extras_field] = {**extra, **(row.get(extras_field) or {})}
+        yield row_number, row
+
+
+def validate_rows(
+    rows: Iterable[Tuple[int, Any]],
+    model: type,
+    summary: ImportSummary,
+    key_field: Optional[str] = None,
+) -> List[Tuple[int, BaseModel]]:
+    """Validate parsed rows against a Pydantic model, recording failures on the summary"""
+    valid = []
+    for row_number, row in rows:
+        summary.total += 1
+        if summary.total > MAX_IMPORT_ROWS:
+            raise HTTPException(status_code=413, detail=f"Too many rows. Maximum is {MAX_IMPORT_ROWS}")
+        if isinstance(row, Exception):
+            add_error(summary, row_number, None, f"Invalid JSON: {row}")
+            continue
+        key = str(row.get(key_field)) if key_field and row.get(key_field) is not None else None
+        try:
+            valid.append((row_number, model.model_validate(row)))
+        except ValidationError as e:
+            add_error(summary, row_number, key, format_validation_error(e))
+    return valid
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()
+    )
+
+
+def add_error(summary: ImportSummary, row: int, key: Optional[str], message: str, skipped: bool = False) -> None:
+    """Record a row error; skipped rows (e.g. already existing) are counted separately from failures"""
+    if skipped:
+        summary.skipped += 1
+    else:
+        summary.failed += 1
+    summary.errors.append(ImportRowError(row=row, key=key, error=message))
+
+
+def chunked(items: List[Any], size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def write_batches(
+    table,
+    records: List[Tuple[int, Optional[str], Dict[str, Any]]],
+    summary: ImportSummary,
+    on_conflict: Optional[str] = None,
+    counter: str = "created",
+) -> List[Dict[str, Any]]:
+    """
+    Insert (or upsert when on_conflict is given) records in chunks.
+    records: list of (row_number, key, data). If a chunk is rejected, its rows
+    are retried one by one so the failing rows can be reported individually.
+    Returns the written rows.
+    """
+    written = []
+    for chunk in chunked(records):
+        payload = [data for _, _, data in chunk]
+        try:
+            query = table.upsert(payload, on_conflict=on_conflict) if on_conflict else table.insert(payload)
+            result = query.execute()
+            written.extend(result.data or [])
+            setattr(summary, counter, getattr(summary, counter) + len(chunk))
+            continue
+        except Exception as e:
+            logger.warning(f"Batch write of {len(chunk)} rows failed, retrying row by row: {e}")
+
+        for row_number, key, data in chunk:
+            try:
+                query = table.upsert(data, on_conflict=on_conflict) if on_conflict else table.insert(data)
+                result = query.execute()
+                written.extend(result.data or [])
+                setattr(summary, counter, getattr(summary, counter) + 1)
+            except Exception as e:
+                add_error(summary, row_number, key, str(e))
+    return written
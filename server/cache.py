@@ -0,0 +1,109 @@
+"""
+In-memory table caches
+Small, rarely written tables (academic years, settings, ...) are loaded
+whole and kept in process memory. A cache reloads when older than its TTL
+or after invalidate(). If a reload fails, the previous rows keep being served.
+
+Invalidation goes through a counter in shared memory. When the app is
+preloaded before gunicorn forks its workers (gunicorn.conf.py), the loaded
+rows are inherited copy-on-write and invalidate() in one worker makes every
+worker reload.
+"""
+
+import time
+import logging
+import threading
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from db import supabase
+
+logger = logging.getLogger(__name__)
+
+
+class TableCache:
+    """
+    Whole-table cache. Subclasses set `table`, may override fetch() and index
+    the rows in _index() (called with the new rows on every load).
+    """
+
+    table: str = ""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.rows: List[Dict[str, Any]] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._generation = multiprocessing.Value("L", 0)
+        self._seen = 0  # generation the current rows were loaded at
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        return supabase.table(self.table).select("*").execute().data or []
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        pass
+
+    def _current(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and self._seen == self._generation.value
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def _bump(self) -> int:
+        with self._generation.get_lock():
+            self._generation.value += 1
+            return self._generation.value
+
+    def load(self) -> List[Dict[str, Any]]:
+        """(Re)load every row from the table"""
+        if not supabase:
+            raise RuntimeError("Database not connected")
+        # Read before fetching, so an invalidate() during the fetch triggers another load
+        generation = self._generation.value
+        rows = self.fetch()
+        self._index(rows)
+        self.rows = rows
+        self._loaded_at = time.monotonic()
+        self._seen = generation
+        logger.info(f"Loaded {len(rows)} rows from {self.table} into cache")
+        return rows
+
+    def refresh(self) -> None:
+        """Reload now (periodic warm-up); on failure the current rows stay in place"""
+        with self._lock:
+            self.load()
+
+    def state(self) -> Dict[str, Any]:
+        """Load state for the readiness report"""
+        return {
+            "loaded": self.loaded,
+            "rows": len(self.rows),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+            "ttl": self.ttl,
+        }
+
+    def invalidate(self) -> None:
+        """Reload on the next read, in every worker process"""
+        self._bump()
+
+    def fresh(self) -> None:
+        """Reload if stale; called at the top of every read"""
+        if self._current():
+            return
+        with self._lock:
+            if self._current():
+                return
+            try:
+                self.load()
+            except Exception as e:
+                # Keep serving the previous rows; retry after another TTL
+                logger.error(f"Error loading {self.table}: {e}")
+                if self._loaded_at is None and not self.rows:
+                    raise
+                self._loaded_at = time.monotonic()
+                self._seen = self._generation.value
@@ -9,8 +9,24 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
-from supabase import create_client, Client
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from starlette.concurrency import run_in_threadpool
+
+# Import bulk import, serialization and academic year utilities
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulk import (
+    ImportSummary,
+    LOOKUP_CHUNK_SIZE,
+    add_error,
+    chunked,
+    detect_format,
+    iter_model_rows,
+    validate_rows,
+    write_batches,
+)
+from serialization import FastJSONResponse
+from academic_years import academic_year_cache
 
 from .schemas import (
     ClassCreate,
@@ -22,10 +38,8 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 TABLE_NAME = "classes"
 
@@ -175,12 +189,12 @@ async def get_class_students(class_id: UUID, page: int = 1, page_size: int = 50)
         offset = (page - 1) * page_size
         result = supabase.table("students").select("*", count="exact").eq("class_id", str(class_id)).eq("is_active", True).range(offset, offset + page_size - 1).order("name").execute()
         
-        return {
+        return FastJSONResponse({
             "students": result.data,
             "total": result.count or len(result.data),
             "page": page,
             "page_size": page_size
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -201,7 +215,9 @@ async def create_class(class_data: ClassCreate):
         if "class_name" in data:
             data["class"] = data.pop("class_name")
         
-        existing = supabase.table(TABLE_NAME).select("id").eq("class", data.get("class", "")).eq("section", data.get("section", "")).eq("academic_year", data.get("academic_year", "2024-25")).execute()
+        data.setdefault("academic_year", academic_year_cache.current_year_name())
+        
+        existing = supabase.table(TABLE_NAME).select("id").eq("class", data.get("class", "")).eq("section", data.get("section", "")).eq("academic_year", data["academic_year"]).execute()
         
         if existing.data:
             raise HTTPException(status_code=400, detail="Class with this section already exists")
@@ -284,3 +300,88 @@ async def delete_class(class_id: UUID, hard_delete: bool = False):
     except Exception as e:
         logger.error(f"Error deleting class: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete class")
+
+
+def _import_classes(file: UploadFile, fmt: str, update_existing: bool, dry_run: bool) -> ImportSummary:
+    """Validate the whole file, then upsert classes on class/section/year in chunks (runs in a worker thread)"""
+    summary = ImportSummary(total=0, dry_run=dry_run)
+    valid = validate_rows(iter_model_rows(file, fmt, ClassCreate), ClassCreate, summary, key_field="class")
+    
+    # Last row wins for repeated class/section/year within the file
+    current_year = academic_year_cache.current_year_name()
+    by_key = {}
+    for row_number, class_data in valid:
+        key = (class_data.class_name, class_data.section, class_data.academic_year or current_year)
+        if key in by_key:
+            add_error(summary, by_key[key][0], "-".join(key),
+                      f"Superseded by row {row_number} with the same class and section", skipped=True)
+        by_key[key] = (row_number, class_data)
+    
+    # Resolve existing classes in one query per chunk of class names
+    existing_ids = {}
+    names = sorted({key[0] for key in by_key})
+    years = sorted({key[2] for key in by_key})
+    for chunk in chunked(names, LOOKUP_CHUNK_SIZE):
+        result = supabase.table(TABLE_NAME).select("id, class, section, academic_year").in_("class", chunk).in_("academic_year", years).execute()
+        existing_ids.update({(row["class"], row["section"], row["academic_year"]): row["id"] for row in result.data})
+    
+    now = datetime.utcnow().isoformat()
+    new_records, update_records = [], []
+    for key, (row_number, class_data) in by_key.items():
+        data = class_data.model_dump(by_alias=False, exclude_none=True)
+        data["class"] = data.pop("class_name")
+        data["academic_year"] = key[2]
+        data["updated_at"] = now
+        data["is_active"] = True
+        label = "-".join(key)
+        
+        if key in existing_ids:
+            if not update_existing:
+                add_error(summary, row_number, label, "Class with this section already exists", skipped=True)
+                continue
+            data["id"] = existing_ids[key]
+            update_records.append((row_number, label, data))
+        else:
+            data["id"] = str(uuid.uuid4())
+            data["created_at"] = now
+            new_records.append((row_number, label, data))
+    
+    if dry_run:
+        summary.created = len(new_records)
+        summary.updated = len(update_records)
+    else:
+        table = supabase.table(TABLE_NAME)
+        write_batches(table, new_records, summary, on_conflict="class,section,academic_year")
+        write_batches(table, update_records, summary, on_conflict="class,section,academic_year", counter="updated")
+    
+    summary.errors.sort(key=lambda e: e.row)
+    return summary
+
+
+@classes_router.post("/import", response_model=ImportSummary)
+async def import_classes(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson (detected from the file if omitted)"),
+    update_existing: bool = True,
+    dry_run: bool = False
+):
+    """
+    Bulk import classes from a CSV or NDJSON file (columns as in ClassCreate, e.g. class, section, room)
+    
+    Classes are upserted on class + section + academic_year in batches - existing ones
+    are updated (or skipped with update_existing=false). Use dry_run=true to validate without writing.
+    """
+    check_supabase()
+    fmt = detect_format(file, format)
+    
+    try:
+        summary = await run_in_threadpool(_import_classes, file, fmt, update_existing, dry_run)
+        logger.info(f"Class import: {summary.created} created, {summary.updated} updated, {summary.skipped} skipped, {summary.failed} failed of {summary.total}")
+        return summary
+    except HTTPException:
+        raise
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except Exception as e:
+        logger.error(f"Error importing classes: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import classes")
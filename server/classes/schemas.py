@@ -14,7 +14,7 @@ class ClassBase(BaseModel):
     class_teacher_id: Optional[str] = None  # TEXT in DB, can be UUID or employee ID
     capacity: int = Field(default=40, ge=1, le=100)
     room: Optional[str] = None
-    academic_year: Optional[str] = "2024-25"
+    academic_year: Optional[str] = None  # Defaults to the current academic year
     
     class Config:
         populate_by_name = True
@@ -11,13 +11,18 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
-from supabase import create_client, Client
 
 # Import authentication utilities
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from admin.auth_utils import get_current_user, require_admin, TokenData
 from security import check_rate_limit
+from jobs import job_queue
+from periodic import periodic
+from notifications import notify_admins
+from exports import csv_response, iter_keyset
+from mappers import RowMapper
+from serialization import FastJSONResponse
 
 from .schemas import (
     ContactCreate,
@@ -29,13 +34,19 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 TABLE_NAME = "contact_requests"
 
+EXPORT_COLUMNS = [
+    "id", "name", "email", "dial_code", "phone", "subject", "message",
+    "status", "notes", "created_at", "updated_at",
+]
+
+# Rows -> ContactResponse dicts
+contact_rows = RowMapper(ContactResponse, defaults={"dial_code": "+91"})
+
 contacts_router = APIRouter(prefix="/api/contacts", tags=["Contacts"])
 
 
@@ -45,6 +56,20 @@ def check_supabase():
         raise HTTPException(status_code=503, detail="Database not connected")
 
 
+# Stats snapshot, refreshed by a background job after every write and periodically
+STATS_REFRESH_INTERVAL = int(os.getenv("STATS_REFRESH_INTERVAL", "300"))
+_stats_snapshot = {"new_count": None}
+
+
+@job_queue.handler("contacts.refresh_stats")
+@periodic.every(STATS_REFRESH_INTERVAL, "contacts.refresh_stats")
+def refresh_contact_stats(payload: Optional[dict] = None) -> int:
+    """Recount new contact requests into the stats snapshot"""
+    result = supabase.table(TABLE_NAME).select("id", count="exact").eq("status", "new").execute()
+    _stats_snapshot["new_count"] = result.count or 0
+    return _stats_snapshot["new_count"]
+
+
 def sanitize_search(search: str) -> str:
     """
     Sanitize search parameter to prevent SQL injection via PostgREST
@@ -56,6 +81,20 @@ def sanitize_search(search: str) -> str:
     return sanitized.strip()
 
 
+def apply_contact_filters(query, status: Optional[str], search: Optional[str]):
+    """Filters shared by the list and export endpoints"""
+    if status:
+        query = query.eq("status", status)
+    
+    if search:
+        # Sanitize search to prevent injection
+        safe_search = sanitize_search(search)
+        if safe_search:
+            query = query.or_(f"name.ilike.%{safe_search}%,email.ilike.%{safe_search}%,subject.ilike.%{safe_search}%")
+    
+    return query
+
+
 @contacts_router.get("/stats")
 async def get_contact_stats(
     current_user: TokenData = Depends(get_current_user)
@@ -66,8 +105,10 @@ async def get_contact_stats(
     check_supabase()
     
     try:
-        result = supabase.table(TABLE_NAME).select("id", count="exact").eq("status", "new").execute()
-        return {"new_count": result.count or 0}
+        count = _stats_snapshot["new_count"]
+        if count is None:
+            count = refresh_contact_stats()
+        return {"new_count": count}
     except Exception as e:
         logger.error(f"Error getting contact stats: {e}")
         return {"new_count": 0}
@@ -88,15 +129,7 @@ async def list_contacts(
     
     try:
         query = supabase.table(TABLE_NAME).select("*", count="exact")
-        
-        if status:
-            query = query.eq("status", status)
-        
-        if search:
-            # Sanitize search to prevent injection
-            safe_search = sanitize_search(search)
-            if safe_search:
-                query = query.or_(f"name.ilike.%{safe_search}%,email.ilike.%{safe_search}%,subject.ilike.%{safe_search}%")
+        query = apply_contact_filters(query, status, search)
         
         offset = (page - 1) * page_size
         query = query.range(offset, offset + page_size - 1)
@@ -104,33 +137,39 @@ async def list_contacts(
         
         result = query.execute()
         
-        contacts = []
-        for c in result.data:
-            contacts.append({
-                "id": c["id"],
-                "name": c["name"],
-                "email": c["email"],
-                "dial_code": c.get("dial_code", "+91"),
-                "phone": c["phone"],
-                "subject": c.get("subject"),
-                "message": c["message"],
-                "status": c.get("status", "new"),
-                "notes": c.get("notes"),
-                "created_at": c.get("created_at"),
-                "updated_at": c.get("updated_at"),
-            })
-        
-        return ContactListResponse(
-            contacts=contacts,
-            total=result.count or len(result.data),
-            page=page,
-            page_size=page_size
-        )
+        # Rows are mapped to the ContactResponse shape, so skip re-validating them
+        return FastJSONResponse({
+            "contacts": contact_rows.many(result.data),
+            "total": result.count or len(result.data),
+            "page": page,
+            "page_size": page_size
+        })
     except Exception as e:
         logger.error(f"Error listing contacts: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch contacts")
 
 
+@contacts_router.get("/export")
+async def export_contacts(
+    status: Optional[str] = Query(None),
+    search: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Export contact requests as CSV (requires authentication, same filters as the list endpoint)
+    """
+    check_supabase()
+    
+    try:
+        rows = iter_keyset(lambda: apply_contact_filters(
+            supabase.table(TABLE_NAME).select(",".join(EXPORT_COLUMNS)), status, search
+        ))
+        return csv_response("contacts", EXPORT_COLUMNS, rows)
+    except Exception as e:
+        logger.error(f"Error exporting contacts: {e}")
+        raise HTTPException(status_code=500, detail="Failed to export contacts")
+
+
 @contacts_router.get("/{contact_id}", response_model=ContactResponse)
 async def get_contact(
     contact_id: str,
@@ -147,20 +186,7 @@ async def get_contact(
         if not result.data:
             raise HTTPException(status_code=404, detail="Contact not found")
         
-        c = result.data
-        return {
-            "id": c["id"],
-            "name": c["name"],
-            "email": c["email"],
-            "dial_code": c.get("dial_code", "+91"),
-            "phone": c["phone"],
-            "subject": c.get("subject"),
-            "message": c["message"],
-            "status": c.get("status", "new"),
-            "notes": c.get("notes"),
-            "created_at": c.get("created_at"),
-            "updated_at": c.get("updated_at"),
-        }
+        return FastJSONResponse(contact_rows.one(result.data))
     except HTTPException:
         raise
     except Exception as e:
@@ -199,19 +225,17 @@ async def create_contact(contact: ContactCreate, request: Request):
             raise HTTPException(status_code=500, detail="Failed to create contact request")
         
         created = result.data[0]
-        return {
-            "id": created["id"],
-            "name": created["name"],
-            "email": created["email"],
-            "dial_code": created.get("dial_code", "+91"),
-            "phone": created["phone"],
-            "subject": created.get("subject"),
-            "message": created["message"],
-            "status": created.get("status", "new"),
-            "notes": created.get("notes"),
-            "created_at": created.get("created_at"),
-            "updated_at": created.get("updated_at"),
-        }
+        
+        # Email + stats refresh run after the response
+        notify_admins(f"New contact request: {created.get('subject') or created['name']}", {
+            "Name": created["name"],
+            "Email": created["email"],
+            "Phone": f"{created.get('dial_code', '')} {created['phone']}".strip(),
+            "Subject": created.get("subject"),
+            "Message": created["message"],
+        })
+        job_queue.enqueue("contacts.refresh_stats")
+        return FastJSONResponse(contact_rows.one(created), status_code=201)
     except HTTPException:
         raise
     except Exception as e:
@@ -244,6 +268,8 @@ async def update_contact_status(
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", contact_id).execute()
         
+        job_queue.enqueue("contacts.refresh_stats")
+        
         return {"message": f"Contact status updated to {status}", "id": contact_id, "status": status}
     except HTTPException:
         raise
@@ -297,6 +323,7 @@ async def delete_contact(
             raise HTTPException(status_code=404, detail="Contact not found")
         
         supabase.table(TABLE_NAME).delete().eq("id", contact_id).execute()
+        job_queue.enqueue("contacts.refresh_stats")
         
         logger.info(f"Contact {contact_id} deleted by {current_user.email}")
         return {"message": "Contact deleted successfully", "id": contact_id}
@@ -0,0 +1,65 @@
+"""
+Shared Supabase client
+Building a client costs tens of milliseconds (httpx pools, auth and storage
+sub-clients), so the process creates exactly one, on first use rather than at
+import time. Routers import `supabase` from here and use it as before:
+`if not supabase` is a cheap "is it configured" check that never connects.
+"""
+
+import os
+import threading
+from typing import Any, Optional
+
+from supabase import create_client, Client
+
+_client: Optional[Client] = None
+_lock = threading.Lock()
+
+
+def _credentials():
+    # Read at call time: server.py loads .env after some modules are imported
+    return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+
+
+def configured() -> bool:
+    return all(_credentials())
+
+
+def get_client() -> Client:
+    """The process-wide client, created on the first call"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not configured():
+                    raise RuntimeError("Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY.")
+                _client = create_client(*_credentials())
+    return _client
+
+
+class LazyClient:
+    """Stands in for a Client; builds the shared one on first attribute access"""
+
+    def __bool__(self) -> bool:
+        return configured()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_client(), name)
+
+
+supabase = LazyClient()
+
+
+def reset() -> None:
+    """
+    Forget the client so the next use builds a new one. Called in the master
+    before gunicorn forks: pooled connections must never be shared between
+    processes.
+    """
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        try:
+            client.postgrest.session.close()
+        except Exception:
+            pass
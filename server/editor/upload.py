@@ -4,16 +4,23 @@ Handles file uploads from the editor pages and returns public URLs.
 """
 
 import os
+import sys
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from supabase import create_client, Client
+from typing import Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from starlette.concurrency import run_in_threadpool
+from supabase import Client
 
-router = APIRouter()
+# Import image processing utilities
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.images import can_process, process_image, upload_variants
+from storage.listing import listing_cache
+from storage.assets import record_asset, uploader, read_upload, find_duplicate
+from admin.auth_utils import get_optional_user, TokenData
+import db
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+router = APIRouter()
 
 # Storage bucket name (defaults to 'site-images' if not set)
 STORAGE_BUCKET = os.getenv("SUPABASE_STORAGE_BUCKET", "site-images")
@@ -27,17 +34,20 @@ MAX_VIDEO_SIZE = 50 * 1024 * 1024  # 50MB for videos
 
 
 def get_supabase_client() -> Client:
-    """Get Supabase client instance."""
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    """Get the shared Supabase client instance."""
+    if not db.configured():
         raise HTTPException(
             status_code=500,
             detail="Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY."
         )
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return db.get_client()
 
 
 @router.post("/upload")
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(
+    file: UploadFile = File(...),
+    current_user: Optional[TokenData] = Depends(get_optional_user)
+):
     """
     Upload an image to Supabase Storage.
     
@@ -46,6 +56,9 @@ async def upload_image(file: UploadFile = File(...)):
         
     Returns:
         dict with 'url' containing the public URL of the uploaded image
+        and 'variants' with thumbnail/WebP/AVIF URLs for raster images.
+        If the same file was uploaded before, the existing object is returned
+        ('deduplicated': True) and nothing is written.
     """
     # Validate file type
     if file.content_type not in ALLOWED_TYPES:
@@ -54,18 +67,42 @@ async def upload_image(file: UploadFile = File(...)):
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_TYPES)}"
         )
     
-    # Read file content
-    content = await file.read()
-    
-    # Validate file size based on type
+    # Read file content, hashing it and enforcing the size limit as it is read
     is_video = file.content_type in ALLOWED_VIDEO_TYPES
     max_size = MAX_VIDEO_SIZE if is_video else MAX_IMAGE_SIZE
     
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB"
-        )
+    try:
+        content, digest = await read_upload(file, max_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Same bytes already stored: return that object instead of writing a copy
+    if db.configured():
+        try:
+            existing = await run_in_threadpool(find_duplicate, STORAGE_BUCKET, digest)
+        except Exception as e:
+            print(f"Duplicate lookup failed, uploading anyway: {e}")
+            existing = None
+        if existing:
+            return {
+                "url": listing_cache.public_url(STORAGE_BUCKET, existing["path"]),
+                "success": True,
+                "filename": existing["path"],
+                "mediaType": "video" if is_video else "image",
+                "variants": existing.get("variants"),
+                "width": existing.get("width"),
+                "height": existing.get("height"),
+                "deduplicated": True,
+            }
+    
+    # Strip EXIF and build responsive variants for raster images
+    processed = None
+    if can_process(file.content_type):
+        try:
+            processed = await run_in_threadpool(process_image, content, file.content_type)
+            content = processed.original
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
     # Generate unique filename
     ext = os.path.splitext(file.filename or "image.jpg")[1].lower()
@@ -92,21 +129,43 @@ async def upload_image(file: UploadFile = File(...)):
     try:
         supabase = get_supabase_client()
         
-        # Upload to Supabase Storage
-        response = supabase.storage.from_(STORAGE_BUCKET).upload(
+        bucket = supabase.storage.from_(STORAGE_BUCKET)
+        
+        # Upload to Supabase Storage (blocking HTTP calls run off the event loop)
+        response = await run_in_threadpool(
+            bucket.upload,
             path=filename,
             file=content,
             file_options={"content-type": file.content_type}
         )
         
         # Get public URL
-        public_url = supabase.storage.from_(STORAGE_BUCKET).get_public_url(filename)
+        public_url = bucket.get_public_url(filename)
+        
+        # Upload variants under variants/<name>/
+        variants = await run_in_threadpool(upload_variants, bucket, filename, processed.variants) if processed else None
+        listing_cache.invalidate()
+        
+        # Index in media_assets after the response
+        record_asset(
+            STORAGE_BUCKET, filename, content, file.content_type,
+            width=processed.width if processed else None,
+            height=processed.height if processed else None,
+            uploaded_by=uploader(current_user),
+            source="editor",
+            source_hash=digest,
+            variants=variants,
+        )
         
         return {
             "url": public_url,
             "success": True,
             "filename": filename,
-            "mediaType": "video" if is_video else "image"
+            "mediaType": "video" if is_video else "image",
+            "variants": variants,
+            "width": processed.width if processed else None,
+            "height": processed.height if processed else None,
+            "deduplicated": False,
         }
         
     except Exception as e:
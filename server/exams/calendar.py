@@ -0,0 +1,220 @@
+"""
+iCalendar feeds for exams
+Feeds are kept as prebuilt bytes per (academic_year, grade). A request within
+FEED_TTL is served from memory; after that a one-row probe (latest updated_at
+plus row count) decides whether anything changed, and only rows updated since
+the last build are fetched and re-rendered. Deletions (a lower count) and the
+periodic FULL_REBUILD_INTERVAL fall back to a full rebuild.
+
+Exam times are stored as school-local wall clock times and written to the
+feed in UTC, so no VTIMEZONE component is needed (RFC 5545 3.3.5 form 2).
+Each feed builds under its own lock.
+"""
+
+import os
+import time
+import hashlib
+import threading
+import multiprocessing
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as clock_time, timezone
+from zoneinfo import ZoneInfo
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from exports import iter_keyset
+
+# Seconds a feed is served without checking the table
+FEED_TTL = int(os.getenv("EXAM_FEED_TTL", "60"))
+# Seconds between full rebuilds (catches rows moved out of a feed's filter)
+FULL_REBUILD_INTERVAL = 3600
+# Exam times are school-local wall clock times
+SCHOOL_TIMEZONE = os.getenv("SCHOOL_TIMEZONE", "Asia/Kolkata")
+SCHOOL_ZONE = ZoneInfo(SCHOOL_TIMEZONE)
+
+PRODID = "-//School Portal//Exams//EN"
+FEED_COLUMNS = "id,subject,grade,academic_year,exam_date,start_time,end_time,duration,location,status,updated_at"
+
+# Drafts (status defaults to Draft) are not published to calendars
+HIDDEN_STATUS = "Draft"
+STATUS_MAP = {"Scheduled": "CONFIRMED", "Completed": "CONFIRMED"}
+
+
+def _escape(value: Any) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold content lines at 75 octets (RFC 5545 3.1)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # never split a UTF-8 sequence
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts)
+
+
+def _utc(day: str, clock: str) -> str:
+    """School-local date + time as a UTC date-time (e.g. 20250310T033000Z)"""
+    local = datetime.combine(
+        date.fromisoformat(str(day)[:10]),
+        clock_time.fromisoformat(str(clock)[:8]),
+        tzinfo=SCHOOL_ZONE,
+    )
+    return local.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _utc_stamp(timestamp: Optional[str]) -> str:
+    if not timestamp:
+        return datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    if parsed.utcoffset() is not None:
+        parsed = parsed - parsed.utcoffset()
+    return parsed.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(row: Dict[str, Any]) -> str:
+    """VEVENT block (CRLF terminated) for one exam row"""
+    stamp = _utc_stamp(row.get("updated_at"))
+    description = " | ".join(
+        part for part in (
+            f"Grade: {row['grade']}",
+            f"Duration: {row['duration']}" if row.get("duration") else None,
+            f"Status: {row.get('status') or 'Draft'}",
+        ) if part
+    )
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{row['id']}@exams",
+        f"DTSTAMP:{stamp}",
+        f"LAST-MODIFIED:{stamp}",
+        f"DTSTART:{_utc(row['exam_date'], row['start_time'])}",
+        f"DTEND:{_utc(row['exam_date'], row['end_time'])}",
+        f"SUMMARY:{_escape(row['subject'])} ({_escape(row['grade'])})",
+        f"DESCRIPTION:{_escape(description)}",
+        f"STATUS:{STATUS_MAP.get(row.get('status'), 'TENTATIVE')}",
+    ]
+    if row.get("location"):
+        lines.append(f"LOCATION:{_escape(row['location'])}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def render_calendar(name: str, events: Iterable[str]) -> bytes:
+    header = "".join(_fold(line) + "\r\n" for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        f"X-WR-TIMEZONE:{SCHOOL_TIMEZONE}",
+    ))
+    return (header + "".join(events) + "END:VCALENDAR\r\n").encode("utf-8")
+
+
+@dataclass
+class Feed:
+    name: str
+    events: Dict[str, Tuple[Any, str]] = field(default_factory=dict)  # id -> (sort key, VEVENT)
+    body: bytes = b""
+    etag: str = ""
+    latest: Optional[str] = None  # newest updated_at included
+    count: int = 0
+    checked_at: float = 0.0
+    rebuilt_at: float = 0.0
+    generation: int = 0
+
+
+class FeedCache:
+    """Prebuilt feeds keyed by (academic_year, grade)"""
+
+    def __init__(self):
+        self._feeds: Dict[Tuple[Optional[str], Optional[str]], Feed] = {}
+        # One lock per feed, so a slow build doesn't hold up unrelated feeds
+        self._locks: Dict[Tuple[Optional[str], Optional[str]], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Bumped on every exam write; feeds checked under an older generation are re-probed.
+        # Lives in shared memory so a write in one worker process reaches the others.
+        self._generation = multiprocessing.Value("L", 0)
+
+    def invalidate(self) -> None:
+        """Force a probe on the next request of every feed (called after exam writes, never waits on a build)"""
+        with self._generation.get_lock():
+            self._generation.value += 1
+
+    def get(self, key: Tuple[Optional[str], Optional[str]], name: str, build_query: Callable[..., Any]) -> Feed:
+        """
+        Current feed for key. build_query(columns, count=None) must return a
+        fresh select filtered to the feed's exams (all statuses).
+        """
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            feed = self._feeds.get(key)
+            now = time.monotonic()
+            generation = self._generation.value
+            if feed and feed.generation == generation and now - feed.checked_at < FEED_TTL:
+                return feed
+
+            probe = (
+                build_query("updated_at", count="exact")
+                .neq("status", HIDDEN_STATUS)
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            latest = probe.data[0]["updated_at"] if probe.data else None
+            count = probe.count or 0
+
+            if feed and now - feed.rebuilt_at < FULL_REBUILD_INTERVAL:
+                if (latest, count) == (feed.latest, feed.count):
+                    feed.checked_at = now
+                    feed.generation = generation
+                    return feed
+                if feed.latest and count >= feed.count:
+                    changed = build_query(FEED_COLUMNS).gt("updated_at", feed.latest).execute().data
+                    self._merge(feed, changed)
+                    if len(feed.events) == count:
+                        self._finish(feed, latest, count, now, generation)
+                        return feed
+
+            feed = Feed(name=name)
+            self._merge(feed, self._fetch_all(build_query))
+            feed.rebuilt_at = now
+            self._finish(feed, latest, count, now, generation)
+            self._feeds[key] = feed
+            return feed
+
+    @staticmethod
+    def _fetch_all(build_query: Callable[..., Any]) -> Iterable[Dict[str, Any]]:
+        return iter_keyset(lambda: build_query(FEED_COLUMNS).neq("status", HIDDEN_STATUS))
+
+    @staticmethod
+    def _merge(feed: Feed, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            exam_id = str(row["id"])
+            if row.get("status") in (None, HIDDEN_STATUS):
+                feed.events.pop(exam_id, None)
+            else:
+                feed.events[exam_id] = ((str(row["exam_date"]), str(row["start_time"]), exam_id), render_event(row))
+
+    @staticmethod
+    def _finish(feed: Feed, latest: Optional[str], count: int, now: float, generation: int) -> None:
+        ordered = sorted(feed.events.values(), key=lambda item: item[0])
+        feed.body = render_calendar(feed.name, (text for _, text in ordered))
+        feed.etag = '"' + hashlib.sha1(feed.body).hexdigest() + '"'
+        feed.latest = latest
+        feed.count = count
+        feed.checked_at = now
+        feed.generation = generation
+
+
+feed_cache = FeedCache()
@@ -0,0 +1,153 @@
+"""
+Exam timetable conflict detection
+Exams are bucketed per (resource, date), where a resource is a room (location)
+or a grade, and each bucket is kept sorted by start time. Checking a slot is a
+binary search plus a backwards scan bounded by the longest exam in the bucket,
+so a check costs O(log n) plus the overlaps it finds; the full report is a
+sorted sweep over every bucket.
+"""
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import date, time
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def _seconds(value: Any) -> int:
+    """Seconds from midnight for a time or 'HH:MM[:SS]' string"""
+    t = value if isinstance(value, time) else time.fromisoformat(str(value))
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).lower()
+
+
+def _clock(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+
+@dataclass(frozen=True)
+class ExamSlot:
+    """When and where an exam runs (times as seconds from midnight)"""
+    id: Optional[str]
+    subject: str
+    grade: str
+    location: Optional[str]
+    exam_date: date
+    start: int
+    end: int
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "ExamSlot":
+        exam_date = row["exam_date"]
+        return cls(
+            id=str(row["id"]) if row.get("id") else None,
+            subject=row.get("subject") or "",
+            grade=row.get("grade") or "",
+            location=row.get("location"),
+            exam_date=exam_date if isinstance(exam_date, date) else date.fromisoformat(str(exam_date)[:10]),
+            start=_seconds(row["start_time"]),
+            end=_seconds(row["end_time"]),
+        )
+
+    def resources(self) -> List[Tuple[str, str]]:
+        """(kind, key) pairs this exam occupies: its grade and, if set, its room"""
+        keys = [("grade", _normalize(self.grade))]
+        room = _normalize(self.location)
+        if room:
+            keys.append(("room", room))
+        return keys
+
+
+@dataclass(frozen=True)
+class Conflict:
+    """Two exams holding the same room or grade at overlapping times"""
+    kind: str  # "room" or "grade"
+    exam: ExamSlot
+    other: ExamSlot
+
+    def to_dict(self) -> Dict[str, Any]:
+        resource = self.exam.location if self.kind == "room" else self.exam.grade
+        return {
+            "kind": self.kind,
+            "resource": resource,
+            "exam_date": self.exam.exam_date.isoformat(),
+            "overlap_start": _clock(max(self.exam.start, self.other.start)),
+            "overlap_end": _clock(min(self.exam.end, self.other.end)),
+            "exam_id": self.exam.id,
+            "exam_subject": self.exam.subject,
+            "other_exam_id": self.other.id,
+            "other_exam_subject": self.other.subject,
+        }
+
+
+class ConflictIndex:
+    """Interval index over exam slots, bucketed per room/grade and date"""
+
+    def __init__(self, slots: Iterable[ExamSlot] = ()):
+        # bucket key -> [(start, end, seq, slot)] sorted by start
+        self._buckets: Dict[Tuple[str, str, date], List[Tuple[int, int, int, ExamSlot]]] = {}
+        # bucket key -> longest exam duration, bounds the backwards scan
+        self._longest: Dict[Tuple[str, str, date], int] = {}
+        self._seq = count()
+        self._size = 0
+        for slot in slots:
+            self.add(slot)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, slot: ExamSlot) -> None:
+        seq = next(self._seq)
+        for kind, key in slot.resources():
+            bucket_key = (kind, key, slot.exam_date)
+            insort(self._buckets.setdefault(bucket_key, []), (slot.start, slot.end, seq, slot))
+            self._longest[bucket_key] = max(self._longest.get(bucket_key, 0), slot.end - slot.start)
+        self._size += 1
+
+    def remove(self, slot: ExamSlot) -> None:
+        """Drop a previously added slot (the longest-exam bounds are kept, which stays correct)"""
+        for kind, key in slot.resources():
+            bucket = self._buckets.get((kind, key, slot.exam_date), [])
+            i = bisect_left(bucket, (slot.start,))
+            while i < len(bucket) and bucket[i][0] == slot.start:
+                if bucket[i][3] is slot:
+                    del bucket[i]
+                    break
+                i += 1
+        self._size -= 1
+
+    def find(self, slot: ExamSlot, exclude_id: Optional[str] = None) -> List[Conflict]:
+        """Indexed exams overlapping slot's room or grade (touching end/start times do not clash)"""
+        conflicts = []
+        for kind, key in slot.resources():
+            bucket_key = (kind, key, slot.exam_date)
+            bucket = self._buckets.get(bucket_key)
+            if not bucket:
+                continue
+            earliest = slot.start - self._longest[bucket_key]
+            # Entries before i start before slot ends; scan back until none can still be running
+            i = bisect_left(bucket, (slot.end,))
+            while i > 0:
+                i -= 1
+                start, end, _, other = bucket[i]
+                if start < earliest:
+                    break
+                if end > slot.start and (exclude_id is None or other.id != exclude_id):
+                    conflicts.append(Conflict(kind=kind, exam=slot, other=other))
+        return conflicts
+
+    def report(self) -> List[Conflict]:
+        """Every overlapping pair, found with one sweep per bucket"""
+        conflicts = []
+        for (kind, _, _), bucket in self._buckets.items():
+            active: List[Tuple[int, int, int, ExamSlot]] = []
+            for entry in bucket:
+                start = entry[0]
+                active = [a for a in active if a[1] > start]
+                conflicts.extend(Conflict(kind=kind, exam=a[3], other=entry[3]) for a in active)
+                active.append(entry)
+        conflicts.sort(key=lambda c: (c.exam.exam_date, c.exam.start, c.kind))
+        return conflicts
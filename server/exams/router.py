@@ -5,17 +5,33 @@ CRUD operations for exam management
 import os
 import uuid
 import logging
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from supabase import create_client, Client
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 
+# Import response serialization utilities
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mappers import RowMapper
+from serialization import FastJSONResponse
+from exports import iter_keyset
+from academic_years import academic_year_cache
+
+from .calendar import feed_cache
+from .conflicts import ConflictIndex, ExamSlot
+from .scheduler import SchedulingError, build_timetable, exam_days, order_papers
 from .schemas import (
     ExamCreate,
     ExamUpdate,
     ExamResponse,
     ExamListResponse,
+    ExamConflictReport,
+    ExamScheduleRequest,
+    ExamScheduleResponse,
+    ExamRolloverRequest,
+    ExamRolloverResponse,
     AcademicYearResponse,
     AcademicYearListResponse,
 )
@@ -23,13 +39,18 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 EXAMS_TABLE = "exams"
-ACADEMIC_YEARS_TABLE = "academic_years"
+
+# Columns needed to place an exam on the timetable
+SLOT_COLUMNS = "id,subject,grade,academic_year,location,exam_date,start_time,end_time"
+SLOT_FIELDS = ("grade", "location", "exam_date", "start_time", "end_time")
+
+# Rows -> response dicts (date/time columns as text)
+exam_rows = RowMapper(ExamResponse, text_fields=("exam_date", "start_time", "end_time"))
+academic_year_rows = RowMapper(AcademicYearResponse, text_fields=("start_date", "end_date"))
 
 exams_router = APIRouter(prefix="/api/exams", tags=["Exams"])
 
@@ -40,6 +61,45 @@ def check_supabase():
         raise HTTPException(status_code=503, detail="Database not connected")
 
 
+def load_conflict_index(
+    academic_year: Optional[str] = None,
+    exam_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> ConflictIndex:
+    """Index the slots of every exam in a year, on a day and/or in a date range"""
+    def build_query():
+        query = supabase.table(EXAMS_TABLE).select(SLOT_COLUMNS)
+        if academic_year:
+            query = query.eq("academic_year", academic_year)
+        if exam_date:
+            query = query.eq("exam_date", exam_date)
+        if start_date:
+            query = query.gte("exam_date", start_date)
+        if end_date:
+            query = query.lte("exam_date", end_date)
+        return query
+    
+    return ConflictIndex(ExamSlot.from_row(row) for row in iter_keyset(build_query))
+
+
+def check_conflicts(row: dict, exclude_id: Optional[str] = None):
+    """
+    Reject an exam whose room or grade is already taken at that time (409).
+    Rooms are physical, so every exam on the same day is checked, whatever its academic year.
+    """
+    slot = ExamSlot.from_row(row)
+    if slot.end <= slot.start:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+    
+    conflicts = load_conflict_index(exam_date=slot.exam_date.isoformat()).find(slot, exclude_id=exclude_id)
+    if conflicts:
+        raise HTTPException(status_code=409, detail={
+            "message": "Exam overlaps another exam in the same room or grade",
+            "conflicts": [c.to_dict() for c in conflicts],
+        })
+
+
 # ============================================================
 # EXAM ENDPOINTS
 # ============================================================
@@ -84,37 +144,77 @@ async def list_exams(
         
         result = query.execute()
         
-        # Format response
-        exams = []
-        for exam in result.data:
-            exams.append({
-                "id": exam["id"],
-                "subject": exam["subject"],
-                "grade": exam["grade"],
-                "academic_year": exam["academic_year"],
-                "exam_date": str(exam["exam_date"]) if exam["exam_date"] else None,
-                "start_time": str(exam["start_time"]) if exam["start_time"] else None,
-                "end_time": str(exam["end_time"]) if exam["end_time"] else None,
-                "duration": exam.get("duration"),
-                "location": exam.get("location"),
-                "participants": exam.get("participants", 0),
-                "status": exam.get("status", "Draft"),
-                "color": exam.get("color", "#3B82F6"),
-                "created_at": exam.get("created_at"),
-                "updated_at": exam.get("updated_at"),
-            })
-        
-        return ExamListResponse(
-            exams=exams,
-            total=result.count or len(result.data),
-            page=page,
-            page_size=page_size
-        )
+        # Rows are mapped to the ExamResponse shape, so skip re-validating them
+        return FastJSONResponse({
+            "exams": exam_rows.many(result.data),
+            "total": result.count or len(result.data),
+            "page": page,
+            "page_size": page_size
+        })
     except Exception as e:
         logger.error(f"Error listing exams: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch exams: {str(e)}")
 
 
+@exams_router.get("/conflicts", response_model=ExamConflictReport)
+async def get_exam_conflicts(academic_year: Optional[str] = Query(None)):
+    """
+    Report every pair of exams double-booking a room or a grade
+    """
+    check_supabase()
+    
+    try:
+        index = load_conflict_index(academic_year=academic_year)
+        conflicts = [c.to_dict() for c in index.report()]
+        return {
+            "academic_year": academic_year,
+            "exams_checked": len(index),
+            "conflicts": conflicts,
+            "total": len(conflicts),
+        }
+    except Exception as e:
+        logger.error(f"Error checking exam conflicts: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to check exam conflicts: {str(e)}")
+
+
+@exams_router.get("/calendar.ics")
+async def get_exam_calendar(
+    request: Request,
+    academic_year: Optional[str] = Query(None),
+    grade: Optional[str] = Query(None),
+):
+    """
+    iCalendar feed of published (non-draft) exams, per academic year and/or grade
+    
+    Calendar apps can subscribe to e.g. /api/exams/calendar.ics?grade=Grade%2010-A.
+    Served from prebuilt bytes with an ETag; unchanged feeds answer 304.
+    """
+    check_supabase()
+    
+    def build_query(columns: str, count: Optional[str] = None):
+        query = supabase.table(EXAMS_TABLE).select(columns, count=count)
+        if academic_year:
+            query = query.eq("academic_year", academic_year)
+        if grade:
+            query = query.eq("grade", grade)
+        return query
+    
+    name = " ".join(part for part in ("Exams", grade, academic_year) if part)
+    try:
+        feed = await run_in_threadpool(feed_cache.get, (academic_year, grade), name, build_query)
+    except Exception as e:
+        logger.error(f"Error building exam calendar: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to build exam calendar: {str(e)}")
+    
+    headers = {"ETag": feed.etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == feed.etag:
+        return Response(status_code=304, headers=headers)
+    
+    filename = "-".join(part.replace(" ", "_") for part in ("exams", grade, academic_year) if part)
+    headers["Content-Disposition"] = f'inline; filename="{filename}.ics"'
+    return Response(content=feed.body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+
 @exams_router.get("/{exam_id}", response_model=ExamResponse)
 async def get_exam(exam_id: str):
     """
@@ -128,23 +228,7 @@ async def get_exam(exam_id: str):
         if not result.data:
             raise HTTPException(status_code=404, detail="Exam not found")
         
-        exam = result.data
-        return {
-            "id": exam["id"],
-            "subject": exam["subject"],
-            "grade": exam["grade"],
-            "academic_year": exam["academic_year"],
-            "exam_date": str(exam["exam_date"]) if exam["exam_date"] else None,
-            "start_time": str(exam["start_time"]) if exam["start_time"] else None,
-            "end_time": str(exam["end_time"]) if exam["end_time"] else None,
-            "duration": exam.get("duration"),
-            "location": exam.get("location"),
-            "participants": exam.get("participants", 0),
-            "status": exam.get("status", "Draft"),
-            "color": exam.get("color", "#3B82F6"),
-            "created_at": exam.get("created_at"),
-            "updated_at": exam.get("updated_at"),
-        }
+        return FastJSONResponse(exam_rows.one(result.data))
     except HTTPException:
         raise
     except Exception as e:
@@ -153,9 +237,11 @@ async def get_exam(exam_id: str):
 
 
 @exams_router.post("", response_model=ExamResponse, status_code=201)
-async def create_exam(exam: ExamCreate):
+async def create_exam(exam: ExamCreate, allow_conflicts: bool = False):
     """
     Create a new exam
+    Rejected with 409 if its room or grade is already booked at that time,
+    unless allow_conflicts is set.
     """
     check_supabase()
     
@@ -178,28 +264,17 @@ async def create_exam(exam: ExamCreate):
             "updated_at": datetime.utcnow().isoformat(),
         }
         
+        if not allow_conflicts:
+            check_conflicts(data)
+        
         result = supabase.table(EXAMS_TABLE).insert(data).execute()
+        feed_cache.invalidate()
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create exam")
         
         created = result.data[0]
-        return {
-            "id": created["id"],
-            "subject": created["subject"],
-            "grade": created["grade"],
-            "academic_year": created["academic_year"],
-            "exam_date": str(created["exam_date"]),
-            "start_time": str(created["start_time"]),
-            "end_time": str(created["end_time"]),
-            "duration": created.get("duration"),
-            "location": created.get("location"),
-            "participants": created.get("participants", 0),
-            "status": created.get("status", "Draft"),
-            "color": created.get("color", "#3B82F6"),
-            "created_at": created.get("created_at"),
-            "updated_at": created.get("updated_at"),
-        }
+        return FastJSONResponse(exam_rows.one(created), status_code=201)
     except HTTPException:
         raise
     except Exception as e:
@@ -208,15 +283,17 @@ async def create_exam(exam: ExamCreate):
 
 
 @exams_router.put("/{exam_id}", response_model=ExamResponse)
-async def update_exam(exam_id: str, exam: ExamUpdate):
+async def update_exam(exam_id: str, exam: ExamUpdate, allow_conflicts: bool = False):
     """
     Update an exam
+    Rescheduling into a booked room or grade slot is rejected with 409,
+    unless allow_conflicts is set.
     """
     check_supabase()
     
     try:
         # Check if exam exists
-        existing = supabase.table(EXAMS_TABLE).select("id").eq("id", exam_id).single().execute()
+        existing = supabase.table(EXAMS_TABLE).select(SLOT_COLUMNS).eq("id", exam_id).single().execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Exam not found")
         
@@ -248,30 +325,19 @@ async def update_exam(exam_id: str, exam: ExamUpdate):
         if not data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
+        if not allow_conflicts and any(field in data for field in SLOT_FIELDS):
+            check_conflicts({**existing.data, **data}, exclude_id=exam_id)
+        
         data["updated_at"] = datetime.utcnow().isoformat()
         
         result = supabase.table(EXAMS_TABLE).update(data).eq("id", exam_id).execute()
+        feed_cache.invalidate()
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update exam")
         
         updated = result.data[0]
-        return {
-            "id": updated["id"],
-            "subject": updated["subject"],
-            "grade": updated["grade"],
-            "academic_year": updated["academic_year"],
-            "exam_date": str(updated["exam_date"]),
-            "start_time": str(updated["start_time"]),
-            "end_time": str(updated["end_time"]),
-            "duration": updated.get("duration"),
-            "location": updated.get("location"),
-            "participants": updated.get("participants", 0),
-            "status": updated.get("status", "Draft"),
-            "color": updated.get("color", "#3B82F6"),
-            "created_at": updated.get("created_at"),
-            "updated_at": updated.get("updated_at"),
-        }
+        return FastJSONResponse(exam_rows.one(updated))
     except HTTPException:
         raise
     except Exception as e:
@@ -299,6 +365,7 @@ async def update_exam_status(exam_id: str, status: str = Query(...)):
             "status": status,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", exam_id).execute()
+        feed_cache.invalidate()
         
         return {"message": f"Exam status updated to {status}", "id": exam_id, "status": status}
     except HTTPException:
@@ -322,6 +389,7 @@ async def delete_exam(exam_id: str):
             raise HTTPException(status_code=404, detail="Exam not found")
         
         supabase.table(EXAMS_TABLE).delete().eq("id", exam_id).execute()
+        feed_cache.invalidate()
         
         return {"message": "Exam deleted successfully", "id": exam_id}
     except HTTPException:
@@ -365,27 +433,13 @@ async def duplicate_exam(exam_id: str):
         }
         
         result = supabase.table(EXAMS_TABLE).insert(data).execute()
+        feed_cache.invalidate()
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to duplicate exam")
         
         created = result.data[0]
-        return {
-            "id": created["id"],
-            "subject": created["subject"],
-            "grade": created["grade"],
-            "academic_year": created["academic_year"],
-            "exam_date": str(created["exam_date"]),
-            "start_time": str(created["start_time"]),
-            "end_time": str(created["end_time"]),
-            "duration": created.get("duration"),
-            "location": created.get("location"),
-            "participants": created.get("participants", 0),
-            "status": created.get("status", "Draft"),
-            "color": created.get("color", "#3B82F6"),
-            "created_at": created.get("created_at"),
-            "updated_at": created.get("updated_at"),
-        }
+        return FastJSONResponse(exam_rows.one(created))
     except HTTPException:
         raise
     except Exception as e:
@@ -393,6 +447,218 @@ async def duplicate_exam(exam_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to duplicate exam: {str(e)}")
 
 
+def _clock(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:00"
+
+
+def _duration_label(seconds: int) -> str:
+    """Duration in the style of existing rows, e.g. 2 hrs or 1 hr 30 min"""
+    hours, minutes = divmod(seconds // 60, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hr" if hours == 1 else f"{hours} hrs")
+    if minutes:
+        parts.append(f"{minutes} min")
+    return " ".join(parts)
+
+
+@exams_router.post("/schedule", response_model=ExamScheduleResponse)
+async def schedule_exams(schedule: ExamScheduleRequest):
+    """
+    Generate a conflict-free timetable for a term and insert it in one batch
+    
+    Each grade sits each of its subjects once, in one of the given rooms and
+    daily sessions, between the academic year's start and end dates (or the
+    given start_date/end_date). No room or grade is double-booked, including
+    against exams already in the table. Use dry_run to preview.
+    """
+    check_supabase()
+    
+    try:
+        year = academic_year_cache.get(schedule.academic_year)
+        if not year:
+            raise HTTPException(status_code=404, detail="Academic year not found")
+        
+        year_start, year_end = year.get("start_date"), year.get("end_date")
+        start = schedule.start_date or (date.fromisoformat(str(year_start)) if year_start else None)
+        end = schedule.end_date or (date.fromisoformat(str(year_end)) if year_end else None)
+        if not start or not end:
+            raise HTTPException(status_code=400, detail="Academic year has no start/end date. Pass start_date and end_date")
+        if end < start:
+            raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+        
+        # Merge repeated grades, dropping repeated subjects
+        subjects: Dict[str, List[str]] = {}
+        participants: Dict[str, int] = {}
+        for entry in schedule.grades:
+            grade_subjects = subjects.setdefault(entry.grade, [])
+            grade_subjects.extend(s for s in entry.subjects if s not in grade_subjects)
+            participants[entry.grade] = max(participants.get(entry.grade, 0), entry.participants)
+        
+        days = exam_days(start, end, schedule.exclude_dates, schedule.include_weekends)
+        sessions = sorted(
+            (t.start_time.hour * 3600 + t.start_time.minute * 60, t.end_time.hour * 3600 + t.end_time.minute * 60)
+            for t in schedule.sessions
+        )
+        rooms = list(dict.fromkeys(schedule.rooms))
+        index = load_conflict_index(start_date=start.isoformat(), end_date=end.isoformat())
+        
+        # CPU-bound search, keep it off the event loop
+        slots = await run_in_threadpool(
+            build_timetable, order_papers(subjects), days, sessions, rooms, index, schedule.max_exams_per_day
+        )
+    except HTTPException:
+        raise
+    except SchedulingError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error scheduling exams: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to schedule exams: {str(e)}")
+    
+    now = datetime.utcnow().isoformat()
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "subject": slot.subject,
+            "grade": slot.grade,
+            "academic_year": schedule.academic_year,
+            "exam_date": slot.exam_date.isoformat(),
+            "start_time": _clock(slot.start),
+            "end_time": _clock(slot.end),
+            "duration": _duration_label(slot.end - slot.start),
+            "location": slot.location,
+            "participants": participants[slot.grade],
+            "status": schedule.status,
+            "color": schedule.color,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for slot in sorted(slots, key=lambda s: (s.exam_date, s.start, s.grade))
+    ]
+    
+    try:
+        if not schedule.dry_run and rows:
+            result = supabase.table(EXAMS_TABLE).insert(rows).execute()
+            feed_cache.invalidate()
+            rows = result.data
+        
+        return FastJSONResponse({
+            "academic_year": schedule.academic_year,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "created": 0 if schedule.dry_run else len(rows),
+            "dry_run": schedule.dry_run,
+            "exams": exam_rows.many(rows),
+        }, status_code=200 if schedule.dry_run else 201)
+    except Exception as e:
+        logger.error(f"Error inserting exam schedule: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save exam schedule: {str(e)}")
+
+
+def _year_start(year_name: str) -> Optional[date]:
+    year = academic_year_cache.get(year_name)
+    if year and year.get("start_date"):
+        return date.fromisoformat(str(year["start_date"]))
+    return None
+
+
+@exams_router.post("/rollover", response_model=ExamRolloverResponse)
+async def rollover_exams(rollover: ExamRolloverRequest):
+    """
+    Copy every exam of an academic year (optionally one grade) into another year
+    
+    Dates move by date_offset_days (default: the gap between the two years'
+    start dates). Copies start as drafts with participants reset, like
+    duplicate_exam. Exams already present in the target year (same subject,
+    grade, date and start time) are skipped, so a rollover can be re-run.
+    Everything is inserted with one batched write.
+    """
+    check_supabase()
+    
+    if rollover.source_academic_year == rollover.target_academic_year:
+        raise HTTPException(status_code=400, detail="Source and target academic years must differ")
+    
+    try:
+        offset = rollover.date_offset_days
+        if offset is None:
+            source_start = _year_start(rollover.source_academic_year)
+            target_start = _year_start(rollover.target_academic_year)
+            if not source_start or not target_start:
+                raise HTTPException(status_code=400, detail="Academic year start dates not set. Pass date_offset_days")
+            offset = (target_start - source_start).days
+        if rollover.align_weekday:
+            offset = round(offset / 7) * 7
+        
+        def build_query(year: str, columns: str):
+            def query():
+                q = supabase.table(EXAMS_TABLE).select(columns).eq("academic_year", year)
+                return q.eq("grade", rollover.grade) if rollover.grade else q
+            return query
+        
+        source = list(iter_keyset(build_query(rollover.source_academic_year, "*")))
+        existing = {
+            (row["subject"], row["grade"], str(row["exam_date"]), str(row["start_time"]))
+            for row in iter_keyset(build_query(rollover.target_academic_year, "id,subject,grade,exam_date,start_time"))
+        }
+        
+        now = datetime.utcnow().isoformat()
+        rows = []
+        for original in source:
+            exam_date = (date.fromisoformat(str(original["exam_date"])[:10]) + timedelta(days=offset)).isoformat()
+            if (original["subject"], original["grade"], exam_date, str(original["start_time"])) in existing:
+                continue
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "subject": original["subject"],
+                "grade": original["grade"],
+                "academic_year": rollover.target_academic_year,
+                "exam_date": exam_date,
+                "start_time": original["start_time"],
+                "end_time": original["end_time"],
+                "duration": original.get("duration"),
+                "location": original.get("location"),
+                "participants": 0,  # Reset participants
+                "status": "Draft",  # Always starts as draft
+                "color": original.get("color", "#3B82F6"),
+                "created_at": now,
+                "updated_at": now,
+            })
+        
+        skipped = len(source) - len(rows)
+        
+        # Report (not block) clashes with exams already on the target dates
+        conflicts = []
+        if rows:
+            dates = [row["exam_date"] for row in rows]
+            index = load_conflict_index(start_date=min(dates), end_date=max(dates))
+            for row in rows:
+                slot = ExamSlot.from_row(row)
+                conflicts.extend(c.to_dict() for c in index.find(slot))
+                index.add(slot)
+        
+        if rows and not rollover.dry_run:
+            result = supabase.table(EXAMS_TABLE).insert(rows).execute()
+            feed_cache.invalidate()
+            rows = result.data
+        
+        return FastJSONResponse({
+            "source_academic_year": rollover.source_academic_year,
+            "target_academic_year": rollover.target_academic_year,
+            "date_offset_days": offset,
+            "matched": len(source),
+            "created": 0 if rollover.dry_run else len(rows),
+            "skipped": skipped,
+            "dry_run": rollover.dry_run,
+            "conflicts": conflicts,
+            "exams": exam_rows.many(rows),
+        }, status_code=200 if rollover.dry_run else 201)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rolling over exams: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to roll over exams: {str(e)}")
+
+
 # ============================================================
 # ACADEMIC YEAR ENDPOINTS
 # ============================================================
@@ -405,25 +671,12 @@ async def list_academic_years():
     check_supabase()
     
     try:
-        result = supabase.table(ACADEMIC_YEARS_TABLE).select("*").eq("is_active", True).order("year_name", desc=True).execute()
-        
-        years = []
-        for year in result.data:
-            years.append({
-                "id": year["id"],
-                "year_name": year["year_name"],
-                "start_date": str(year["start_date"]) if year.get("start_date") else None,
-                "end_date": str(year["end_date"]) if year.get("end_date") else None,
-                "is_current": year.get("is_current", False),
-                "is_active": year.get("is_active", True),
-                "created_at": year.get("created_at"),
-                "updated_at": year.get("updated_at"),
-            })
+        years = academic_year_cache.all()
         
-        return AcademicYearListResponse(
-            academic_years=years,
-            total=len(years)
-        )
+        return FastJSONResponse({
+            "academic_years": academic_year_rows.many(years),
+            "total": len(years)
+        })
     except Exception as e:
         logger.error(f"Error listing academic years: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch academic years: {str(e)}")
@@ -437,28 +690,12 @@ async def get_current_academic_year():
     check_supabase()
     
     try:
-        result = supabase.table(ACADEMIC_YEARS_TABLE).select("*").eq("is_current", True).single().execute()
-        
-        if not result.data:
-            # Fallback to most recent
-            result = supabase.table(ACADEMIC_YEARS_TABLE).select("*").eq("is_active", True).order("year_name", desc=True).limit(1).execute()
-            if result.data:
-                year = result.data[0]
-            else:
-                raise HTTPException(status_code=404, detail="No academic year found")
-        else:
-            year = result.data
+        # Flagged current year, else the most recent active one
+        year = academic_year_cache.current()
+        if not year:
+            raise HTTPException(status_code=404, detail="No academic year found")
         
-        return {
-            "id": year["id"],
-            "year_name": year["year_name"],
-            "start_date": str(year["start_date"]) if year.get("start_date") else None,
-            "end_date": str(year["end_date"]) if year.get("end_date") else None,
-            "is_current": year.get("is_current", False),
-            "is_active": year.get("is_active", True),
-            "created_at": year.get("created_at"),
-            "updated_at": year.get("updated_at"),
-        }
+        return FastJSONResponse(academic_year_rows.one(year))
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,121 @@
+"""
+Exam timetable generator
+Places one exam per (grade, subject) into (day, session, room) slots without
+double-booking a room or a grade, using a greedy depth-first search with
+backtracking. Existing exams are seeded into the ConflictIndex so generated
+papers also avoid them.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .conflicts import ConflictIndex, ExamSlot
+
+# Candidate placements tried before giving up
+MAX_SEARCH_STEPS = 200000
+
+
+class SchedulingError(ValueError):
+    """No conflict-free timetable exists (or none was found within the search limit)"""
+
+
+@dataclass(frozen=True)
+class Paper:
+    grade: str
+    subject: str
+
+
+def exam_days(start: date, end: date, exclude: Sequence[date] = (), include_weekends: bool = False) -> List[date]:
+    """Dates in [start, end] available for exams"""
+    excluded = set(exclude)
+    days = []
+    day = start
+    while day <= end:
+        if day not in excluded and (include_weekends or day.weekday() < 5):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def order_papers(subjects: Dict[str, List[str]]) -> List[Paper]:
+    """
+    Round-robin across grades, largest grades first, so grades compete for
+    rooms on equal terms and the most constrained grades are placed early
+    """
+    grades = sorted(subjects, key=lambda g: -len(subjects[g]))
+    papers = []
+    for i in range(max((len(s) for s in subjects.values()), default=0)):
+        papers.extend(Paper(grade, subjects[grade][i]) for grade in grades if i < len(subjects[grade]))
+    return papers
+
+
+def build_timetable(
+    papers: List[Paper],
+    days: List[date],
+    sessions: List[Tuple[int, int]],
+    rooms: List[str],
+    index: ConflictIndex,
+    max_per_day: int = 1,
+    max_steps: int = MAX_SEARCH_STEPS,
+) -> List[ExamSlot]:
+    """
+    Assign every paper a day, session (start, end seconds) and room.
+    index must hold existing exams; placed papers are added to it.
+    Raises SchedulingError when no assignment is found.
+    """
+    if not papers:
+        return []
+    if not days or not sessions or not rooms:
+        raise SchedulingError("Need at least one exam day, session and room")
+
+    per_grade: Dict[str, int] = {}
+    for paper in papers:
+        per_grade[paper.grade] = per_grade.get(paper.grade, 0) + 1
+    per_day_capacity = min(max_per_day, len(sessions))
+    for grade, needed in per_grade.items():
+        if needed > len(days) * per_day_capacity:
+            raise SchedulingError(
+                f"{grade} has {needed} exams but only {len(days)} days x {per_day_capacity} per day available"
+            )
+    if len(papers) > len(days) * len(sessions) * len(rooms):
+        raise SchedulingError(f"{len(papers)} exams do not fit in {len(days)} days x {len(sessions)} sessions x {len(rooms)} rooms")
+
+    # exams per (grade, day) placed so far
+    load: Dict[Tuple[str, date], int] = {}
+    placed: List[Optional[ExamSlot]] = [None] * len(papers)
+    steps = 0
+
+    def candidates(paper: Paper):
+        # Least-loaded days first spreads each grade's exams across the window
+        for day in sorted(days, key=lambda d: load.get((paper.grade, d), 0)):
+            if load.get((paper.grade, day), 0) >= max_per_day:
+                continue
+            for start, end in sessions:
+                for room in rooms:
+                    yield ExamSlot(id=None, subject=paper.subject, grade=paper.grade,
+                                   location=room, exam_date=day, start=start, end=end)
+
+    def place(i: int) -> bool:
+        nonlocal steps
+        if i == len(papers):
+            return True
+        paper = papers[i]
+        for slot in candidates(paper):
+            steps += 1
+            if steps > max_steps:
+                raise SchedulingError("No conflict-free timetable found within the search limit")
+            if index.find(slot):
+                continue
+            index.add(slot)
+            load[(paper.grade, slot.exam_date)] = load.get((paper.grade, slot.exam_date), 0) + 1
+            placed[i] = slot
+            if place(i + 1):
+                return True
+            index.remove(slot)
+            load[(paper.grade, slot.exam_date)] -= 1
+        return False
+
+    if not place(0):
+        raise SchedulingError("No conflict-free timetable exists for these subjects, rooms and dates")
+    return list(placed)
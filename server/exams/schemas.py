@@ -4,7 +4,7 @@ Exam Pydantic Schemas
 from datetime import date, time, datetime
 from typing import Optional, List
 from uuid import UUID
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ExamBase(BaseModel):
@@ -71,6 +71,103 @@ class ExamListResponse(BaseModel):
     page_size: int
 
 
+class ExamConflict(BaseModel):
+    """Two exams holding the same room or grade at overlapping times"""
+    kind: str  # room, grade
+    resource: Optional[str] = None
+    exam_date: str
+    overlap_start: str
+    overlap_end: str
+    exam_id: Optional[str] = None
+    exam_subject: str
+    other_exam_id: Optional[str] = None
+    other_exam_subject: str
+
+
+class ExamConflictReport(BaseModel):
+    """Response schema for the timetable conflict report"""
+    academic_year: Optional[str] = None
+    exams_checked: int
+    conflicts: List[ExamConflict]
+    total: int
+
+
+class ExamSession(BaseModel):
+    """A daily exam sitting, e.g. 09:00-12:00"""
+    start_time: time
+    end_time: time
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class GradeSubjects(BaseModel):
+    """Subjects to schedule for one grade"""
+    grade: str = Field(..., min_length=1, max_length=20)
+    subjects: List[str] = Field(..., min_length=1, max_length=20)
+    participants: int = 0
+
+
+class ExamScheduleRequest(BaseModel):
+    """
+    Schema for generating a term's timetable.
+    Dates default to the academic year's start_date/end_date.
+    """
+    academic_year: str = Field(..., min_length=1, max_length=10)
+    grades: List[GradeSubjects] = Field(..., min_length=1, max_length=20)
+    rooms: List[str] = Field(..., min_length=1)
+    sessions: List[ExamSession] = Field(
+        default_factory=lambda: [ExamSession(start_time=time(9, 0), end_time=time(12, 0))]
+    )
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    exclude_dates: List[date] = []  # holidays
+    include_weekends: bool = False
+    max_exams_per_day: int = Field(1, ge=1)  # per grade
+    status: str = "Draft"
+    color: str = "#3B82F6"
+    dry_run: bool = False
+
+
+class ExamScheduleResponse(BaseModel):
+    """Response schema for a generated timetable"""
+    academic_year: str
+    start_date: str
+    end_date: str
+    created: int
+    dry_run: bool
+    exams: List[ExamResponse]
+
+
+class ExamRolloverRequest(BaseModel):
+    """
+    Schema for copying a year's exams into another academic year.
+    date_offset_days defaults to the gap between the two years' start dates.
+    """
+    source_academic_year: str = Field(..., min_length=1, max_length=10)
+    target_academic_year: str = Field(..., min_length=1, max_length=10)
+    grade: Optional[str] = None
+    date_offset_days: Optional[int] = None
+    align_weekday: bool = False  # round the offset to whole weeks
+    dry_run: bool = False
+
+
+class ExamRolloverResponse(BaseModel):
+    """Response schema for an exam rollover"""
+    source_academic_year: str
+    target_academic_year: str
+    date_offset_days: int
+    matched: int
+    created: int
+    skipped: int  # already present in the target year
+    dry_run: bool
+    conflicts: List[ExamConflict]
+    exams: List[ExamResponse]
+
+
 # Academic Year Schemas
 class AcademicYearBase(BaseModel):
     """Base academic year schema"""
@@ -0,0 +1,114 @@
+"""
+Gunicorn configuration (production entrypoint, see start.sh)
+
+The app is imported and its read-only caches (page content, academic years,
+settings, notices) are loaded once in the master, then N uvicorn workers are
+forked from it and share that memory copy-on-write. Each worker runs on
+uvloop/httptools when installed (uvicorn[standard]) and is recycled after
+WORKER_MAX_REQUESTS requests or once its RSS passes WORKER_MAX_MEMORY_MB.
+
+Environment:
+    PORT                    listen port (default 8000)
+    WEB_CONCURRENCY         worker count (default: CPU count, at most 4)
+    WORKER_MAX_REQUESTS     requests before a worker is replaced (0 = never)
+    WORKER_MAX_MEMORY_MB    RSS before a worker is replaced (0 = never)
+    SHUTDOWN_TIMEOUT        graceful shutdown deadline, seconds (lifecycle.py)
+
+On shutdown a worker waits up to SHUTDOWN_TIMEOUT - SHUTDOWN_FLUSH_MARGIN for
+in-flight requests, then runs the lifespan shutdown (job queue, log flush);
+the master only kills it SHUTDOWN_FLUSH_MARGIN seconds after the deadline.
+"""
+
+import gc
+import os
+import math
+import signal
+import threading
+
+try:
+    from uvicorn_worker import UvicornWorker
+except ImportError:
+    from uvicorn.workers import UvicornWorker
+
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
+# Seconds of the shutdown kept for the lifespan shutdown after requests are drained
+SHUTDOWN_FLUSH_MARGIN = 5
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """Uvicorn worker that stops waiting for in-flight requests before the drain deadline"""
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "timeout_graceful_shutdown": max(1.0, SHUTDOWN_TIMEOUT - SHUTDOWN_FLUSH_MARGIN),
+    }
+
+
+worker_class = DrainingUvicornWorker
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(os.cpu_count() or 1, 4))))
+
+# Import the app once in the master so workers inherit it (and its warm caches)
+preload_app = True
+
+# Recycle workers: requests (jittered so they don't all restart together) and memory
+max_requests = int(os.getenv("WORKER_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+MAX_MEMORY_MB = int(os.getenv("WORKER_MAX_MEMORY_MB", "0"))
+MEMORY_CHECK_INTERVAL = 30
+
+# Kill only after the lifespan shutdown has had its time
+graceful_timeout = math.ceil(SHUTDOWN_TIMEOUT) + SHUTDOWN_FLUSH_MARGIN
+timeout = 120
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+
+def when_ready(server):
+    """Master, before the first fork: warm the shared caches"""
+    import db
+    from jobs import job_queue
+    from server import supabase, table_caches
+
+    if supabase:
+        for cache in table_caches():
+            try:
+                cache.load()
+            except Exception as e:
+                server.log.warning(f"Could not preload {cache.table} cache: {e}")
+    # Each worker opens its own connections (Supabase client, job store)
+    db.reset()
+    if job_queue.store:
+        job_queue.store.close()
+    # Move everything loaded so far out of the collector's reach, so collections
+    # in the workers don't write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded shared caches, forking {workers} worker(s)")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _watch_memory(worker):
+    event = threading.Event()
+    while not event.wait(MEMORY_CHECK_INTERVAL):
+        rss = _rss_mb()
+        if rss > MAX_MEMORY_MB:
+            worker.log.warning(
+                f"Worker {worker.pid} using {rss:.0f} MB (limit {MAX_MEMORY_MB} MB), restarting gracefully"
+            )
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+def post_fork(server, worker):
+    """Worker, right after fork: start the memory watchdog"""
+    if MAX_MEMORY_MB and os.path.exists("/proc/self/statm"):
+        threading.Thread(target=_watch_memory, args=(worker,), daemon=True).start()
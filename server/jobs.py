@@ -0,0 +1,423 @@
+"""
+Background job queue
+In-process asyncio worker pool for non-critical post-request work
+(storage cleanup, thumbnail generation, notification emails, stats refresh).
+
+Jobs are retried with exponential backoff. Set JOB_QUEUE_DB to a SQLite
+file path to persist pending jobs so they survive restarts. With several
+worker processes sharing the file, each job is claimed by exactly one of
+them (see SQLiteJobStore).
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    """A unit of background work"""
+    name: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: float = field(default_factory=time.time)
+    last_error: Optional[str] = None
+
+
+class SQLiteJobStore:
+    """
+    Persists jobs in a local SQLite file shared by all worker processes
+    Rows are deleted on success and marked 'failed' once retries are exhausted.
+
+    Each process opens its own connection on first use (never across fork)
+    and only runs jobs it owns: rows it saved itself, or 'pending' rows it
+    claimed atomically. Owned rows are 'running' and kept alive by
+    heartbeat(); rows of a process that died without a heartbeat for
+    claim_timeout seconds go back to 'pending'. A clean stop() releases the
+    process's unfinished rows right away.
+    """
+
+    def __init__(self, path: str, claim_timeout: float = 120.0):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.owner = ""
+        # Create the schema up front (and fail early on a bad path), without keeping a connection
+        conn = self._connect()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                owner TEXT,
+                claimed_at REAL
+            )
+        """)
+        # Stores created before jobs were claimed per process
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("claimed_at", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_at)")
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This process's connection (a forked child opens its own)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._conn = self._connect()
+            self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+        return self._conn
+
+    def save(self, job: Job) -> None:
+        """Insert or update a job owned by this process"""
+        conn = self.conn
+        with self._lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, name, payload, attempts, max_attempts, run_at, status, last_error, created_at, owner, claimed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'running', ?, ?, ?, ?)",
+                (job.id, job.name, json.dumps(job.payload), job.attempts, job.max_attempts,
+                 job.run_at, job.last_error, time.time(), self.owner, time.time()),
+            )
+
+    def delete(self, job_id: str) -> None:
+        conn = self.conn
+        with self._lock:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def mark_failed(self, job: Job) -> None:
+        conn = self.conn
+        with self._lock:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', attempts = ?, last_error = ?, owner = NULL WHERE id = ?",
+                (job.attempts, job.last_error, job.id),
+            )
+
+    def claim_pending(self) -> List[Job]:
+        """
+        Take ownership of unowned jobs (including those of processes that
+        stopped sending heartbeats) and return only the rows claimed now
+        """
+        conn = self.conn
+        now = time.time()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', owner = NULL "
+                    "WHERE status = 'running' AND owner != ? AND claimed_at < ?",
+                    (self.owner, now - self.claim_timeout),
+                )
+                rows = conn.execute(
+                    "SELECT id, name, payload, attempts, max_attempts, run_at, last_error "
+                    "FROM jobs WHERE status = 'pending' ORDER BY run_at"
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE jobs SET status = 'running', owner = ?, claimed_at = ? WHERE id = ? AND status = 'pending'",
+                    [(self.owner, now, r[0]) for r in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [
+            Job(id=r[0], name=r[1], payload=json.loads(r[2]), attempts=r[3],
+                max_attempts=r[4], run_at=r[5], last_error=r[6])
+            for r in rows
+        ]
+
+    def heartbeat(self) -> None:
+        """Refresh the claim on every job this process holds"""
+        conn = self.conn
+        with self._lock:
+            conn.execute(
+                "UPDATE jobs SET claimed_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), self.owner),
+            )
+
+    def release(self) -> int:
+        """Hand this process's unfinished jobs back to the other processes"""
+        conn = self.conn
+        with self._lock:
+            return conn.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL WHERE owner = ? AND status = 'running'",
+                (self.owner,),
+            ).rowcount
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            with self._lock:
+                self._conn.close()
+        self._conn = None
+        self._pid = None
+
+
+class JobQueue:
+    """
+    Async job queue with retry and exponential backoff
+
+    Usage:
+        @job_queue.handler("storage.remove")
+        def remove_objects(payload: dict):
+            ...
+
+        job_queue.enqueue("storage.remove", {"bucket": "photos", "paths": [...]})
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        store: Optional[SQLiteJobStore] = None,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+    ):
+        self.workers = workers
+        self.store = store
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._handlers: Dict[str, Callable] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._delayed: Dict[str, Tuple[asyncio.TimerHandle, Job]] = {}
+        self._maintenance: Optional[asyncio.Task] = None
+        self._running = False
+        self.processed = 0
+        self.failed = 0
+
+    # ----- registration -----
+
+    def handler(self, name: str):
+        """Decorator registering a sync or async function as the handler for a job name"""
+        def decorator(func: Callable) -> Callable:
+            self._handlers[name] = func
+            return func
+        return decorator
+
+    # ----- producer side -----
+
+    def enqueue(
+        self,
+        name: str,
+        payload: Optional[Dict[str, Any]] = None,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> str:
+        """
+        Schedule a job and return its id immediately
+        Payload must be JSON serializable when persistence is enabled
+        """
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job '{name}'")
+
+        job = Job(
+            name=name,
+            payload=payload or {},
+            max_attempts=max_attempts or self.max_attempts,
+            run_at=time.time() + delay,
+        )
+        if self.store:
+            self.store.save(job)
+        self._schedule(job)
+        return job.id
+
+    def _schedule(self, job: Job) -> None:
+        delay = job.run_at - time.time()
+        if delay <= 0 or not self._running:
+            # Delayed jobs enqueued before start() are picked up once workers run
+            self._queue.put_nowait(job)
+            return
+        loop = asyncio.get_running_loop()
+        self._delayed[job.id] = (loop.call_later(delay, self._release, job), job)
+
+    def _release(self, job: Job) -> None:
+        self._delayed.pop(job.id, None)
+        self._queue.put_nowait(job)
+
+    # ----- consumer side -----
+
+    async def _run(self, job: Job) -> None:
+        handler = self._handlers.get(job.name)
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job '{job.name}'")
+        if asyncio.iscoroutinefunction(handler):
+            await handler(job.payload)
+        else:
+            await run_in_threadpool(handler, job.payload)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base ** attempts)
+        return delay + random.uniform(0, delay / 4)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.run_at > time.time():
+                    # Loaded early (e.g. before start); wait for its slot without blocking a worker
+                    self._schedule(job)
+                    continue
+
+                job.attempts += 1
+                try:
+                    await self._run(job)
+                except Exception as e:
+                    job.last_error = f"{type(e).__name__}: {e}"
+                    if job.attempts >= job.max_attempts:
+                        self.failed += 1
+                        logger.error(f"Job {job.name} ({job.id}) failed after {job.attempts} attempts: {job.last_error}")
+                        if self.store:
+                            self.store.mark_failed(job)
+                    else:
+                        delay = self._backoff(job.attempts)
+                        job.run_at = time.time() + delay
+                        logger.warning(f"Job {job.name} ({job.id}) attempt {job.attempts} failed: {job.last_error}; retrying in {delay:.1f}s")
+                        if self.store:
+                            self.store.save(job)
+                        self._schedule(job)
+                else:
+                    self.processed += 1
+                    if self.store:
+                        self.store.delete(job.id)
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {e}")
+            finally:
+                self._queue.task_done()
+
+    # ----- persistence -----
+
+    def _claim(self) -> None:
+        """Schedule persisted jobs no live process owns"""
+        claimed = self.store.claim_pending()
+        for job in claimed:
+            self._schedule(job)
+        if claimed:
+            logger.info(f"Job queue claimed {len(claimed)} pending job(s) from {self.store.path}")
+
+    async def _maintain(self) -> None:
+        """Keep this process's claims alive and pick up jobs released by other processes"""
+        interval = self.store.claim_timeout / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.store.heartbeat()
+                self._claim()
+            except Exception as e:
+                logger.error(f"Job store maintenance failed: {e}")
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        """Start worker tasks and claim persisted jobs"""
+        if self._running:
+            return
+        self._running = True
+
+        if self.store:
+            self._claim()
+            self._maintenance = asyncio.create_task(self._maintain())
+
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} worker(s)")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Wait up to `timeout` seconds for ready jobs to finish, then stop workers.
+        Without a store, jobs waiting for a retry get one last attempt now
+        instead of being dropped.
+        """
+        if not self._running:
+            return
+        if not self.store and self._delayed:
+            logger.info(f"Running {len(self._delayed)} delayed job(s) before shutdown")
+            for handle, job in list(self._delayed.values()):
+                handle.cancel()
+                job.run_at = time.time()
+                job.max_attempts = job.attempts + 1
+                self._release(job)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job queue stopped with {self._queue.qsize()} job(s) still queued")
+
+        for handle, _ in self._delayed.values():
+            handle.cancel()
+        if self._delayed and not self.store:
+            logger.warning(f"Dropping {len(self._delayed)} delayed job(s) (no JOB_QUEUE_DB configured)")
+        self._delayed.clear()
+
+        tasks = self._tasks + ([self._maintenance] if self._maintenance else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._maintenance = None
+        self._running = False
+
+        if self.store:
+            released = self.store.release()
+            if released:
+                logger.info(f"Released {released} unfinished job(s) to {self.store.path}")
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting to run (ready + delayed for retry)"""
+        return self._queue.qsize() + len(self._delayed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "delayed": len(self._delayed),
+            "depth": self.depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "persistent": self.store is not None,
+        }
+
+
+def _create_job_queue() -> JobQueue:
+    db_path = os.getenv("JOB_QUEUE_DB")
+    store = None
+    if db_path:
+        try:
+            store = SQLiteJobStore(db_path, claim_timeout=float(os.getenv("JOB_CLAIM_TIMEOUT", "120")))
+        except Exception as e:
+            logger.warning(f"Could not open job store {db_path}, falling back to in-memory queue: {e}")
+    return JobQueue(workers=int(os.getenv("JOB_QUEUE_WORKERS", "2")), store=store)
+
+
+# Global job queue instance (started/stopped by server lifespan)
+job_queue = _create_job_queue()
@@ -0,0 +1,130 @@
+"""
+Graceful shutdown
+Tracks in-flight HTTP requests and runs a drain phase on redeploy. On
+SIGTERM/SIGINT the app is marked draining before uvicorn closes its sockets:
+/ready turns 503 so load balancers stop routing, and new requests on
+existing keep-alive connections get 503 with Connection: close, while
+requests already running (uploads, batch upserts) finish.
+
+Uvicorn waits for those requests (bounded by --timeout-graceful-shutdown),
+then the lifespan shutdown flushes background jobs and logs within whatever
+is left of SHUTDOWN_TIMEOUT.
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+# Seconds from the shutdown signal until the process must be done
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
+
+# Always answered, so probes can see the draining state
+PROBE_PATHS = {"/health", "/ready"}
+
+# Set while an accepted request dispatches sub-requests into the app (batch API);
+# those are part of the outer request, already counted and allowed to finish
+nested_request: ContextVar[bool] = ContextVar("nested_request", default=False)
+
+
+class Drain:
+    """In-flight request count and the shutdown deadline"""
+
+    def __init__(self, timeout: float = SHUTDOWN_TIMEOUT):
+        self.timeout = timeout
+        self.inflight = 0
+        self.draining = False
+        self.deadline: Optional[float] = None
+
+    def start(self) -> None:
+        """Enter the drain phase (idempotent); the deadline starts now"""
+        if self.draining:
+            return
+        self.draining = True
+        self.deadline = time.monotonic() + self.timeout
+        logger.info(f"Draining: {self.inflight} request(s) in flight, deadline {self.timeout:g}s")
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (the full timeout if not draining)"""
+        if self.deadline is None:
+            return self.timeout
+        return max(0.0, self.deadline - time.monotonic())
+
+    async def wait_idle(self) -> bool:
+        """Wait until no request is in flight or the deadline passes; True if idle"""
+        while self.inflight and self.remaining() > 0:
+            await asyncio.sleep(0.05)
+        if self.inflight:
+            logger.warning(f"Drain deadline passed with {self.inflight} request(s) in flight")
+        return not self.inflight
+
+    def install_signal_handlers(self) -> None:
+        """
+        Mark draining as soon as a shutdown signal arrives, then hand the signal
+        to the server's own handler. No-op outside the main thread or when the
+        server did not install a Python handler.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                self.start()
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    @staticmethod
+    def flush_logs() -> None:
+        """Flush log handlers and stdout so the last lines reach the platform"""
+        for handler in logging.getLogger().handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+class InFlightMiddleware:
+    """ASGI middleware counting in-flight requests and refusing new ones while draining"""
+
+    def __init__(self, app, drain: Drain):
+        self.app = app
+        self.drain = drain
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or nested_request.get():
+            await self.app(scope, receive, send)
+            return
+
+        if self.drain.draining and scope["path"] not in PROBE_PATHS:
+            response = PlainTextResponse(
+                "Server is restarting, please retry",
+                status_code=503,
+                headers={"Retry-After": "5", "Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.drain.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.drain.inflight -= 1
+
+
+# Global drain state (signal handlers installed and shutdown run by server lifespan)
+drain = Drain()
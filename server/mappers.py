@@ -0,0 +1,63 @@
+"""
+Row mappers
+Turn PostgREST rows into response dicts shaped exactly like a response schema.
+Each mapper compiles one dict-building function from the schema's fields when
+it is created, so mapping a row is a single call with no per-field Python loop.
+
+Because the output has exactly the schema's keys (defaults applied, date/time
+columns as text), handlers can return it as a FastJSONResponse instead of
+having FastAPI validate every row against the response_model again.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+def _text(value: Any) -> Optional[str]:
+    """date/time columns are returned as text (empty values become None)"""
+    return str(value) if value else None
+
+
+class RowMapper:
+    """
+    Maps rows onto a response schema's fields.
+
+    text_fields: columns rendered with str() (None when empty)
+    defaults: overrides for schema defaults; a default replaces missing or null values
+    """
+
+    def __init__(
+        self,
+        model: type,
+        text_fields: Sequence[str] = (),
+        defaults: Optional[Dict[str, Any]] = None,
+    ):
+        self.model = model
+        defaults = defaults or {}
+
+        values = []
+        items = []
+        for name, info in model.model_fields.items():
+            if name in text_fields:
+                items.append(f"{name!r}: _text(row.get({name!r}))")
+                continue
+            default = defaults[name] if name in defaults else (
+                None if info.is_required() else info.get_default(call_default_factory=True)
+            )
+            if default is None:
+                items.append(f"{name!r}: row.get({name!r})")
+            else:
+                values.append(default)
+                items.append(f"{name!r}: _or(row.get({name!r}), _defaults[{len(values) - 1}])")
+
+        source = "def map_row(row):\n    return {" + ", ".join(items) + "}\n"
+        namespace = {"_text": _text, "_or": _or, "_defaults": tuple(values)}
+        exec(compile(source, f"<RowMapper {model.__name__}>", "exec"), namespace)
+        self.one = namespace["map_row"]
+
+    def many(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        one = self.one
+        return [one(row) for row in rows]
+
+
+def _or(value: Any, default: Any) -> Any:
+    return default if value is None else value
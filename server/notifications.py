@@ -0,0 +1,54 @@
+"""
+Notification emails
+Sent from the background job queue so public form submissions return immediately.
+Configure SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_FROM and
+NOTIFY_EMAIL (comma-separated recipients); without SMTP_HOST emails are only logged.
+"""
+
+import os
+import ssl
+import smtplib
+import logging
+from email.message import EmailMessage
+
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER or "noreply@school.edu")
+NOTIFY_EMAIL = [e.strip() for e in os.getenv("NOTIFY_EMAIL", "").split(",") if e.strip()]
+
+
+@job_queue.handler("notifications.email")
+def send_email(payload: dict):
+    """
+    Send a plain-text email
+    Payload: { "subject": str, "body": str, "to": [optional list of recipients] }
+    """
+    recipients = payload.get("to") or NOTIFY_EMAIL
+    if not SMTP_HOST or not recipients:
+        logger.info(f"Email not sent (SMTP not configured): {payload.get('subject')}")
+        return
+
+    message = EmailMessage()
+    message["Subject"] = payload["subject"]
+    message["From"] = SMTP_FROM
+    message["To"] = ", ".join(recipients)
+    message.set_content(payload["body"])
+
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+        smtp.starttls(context=ssl.create_default_context())
+        if SMTP_USER and SMTP_PASSWORD:
+            smtp.login(SMTP_USER, SMTP_PASSWORD)
+        smtp.send_message(message)
+    logger.info(f"Notification email sent: {payload['subject']}")
+
+
+def notify_admins(subject: str, lines: dict) -> None:
+    """Queue a notification email to the school admins"""
+    body = "\n".join(f"{label}: {value}" for label, value in lines.items() if value)
+    job_queue.enqueue("notifications.email", {"subject": subject, "body": body})
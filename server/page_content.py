@@ -0,0 +1,57 @@
+"""
+Page content snapshot
+site_pages_content is read on every public page view and written only from
+the editor, so the whole table is kept in memory (see cache.TableCache) and
+pages are answered without a database round trip. Editor writes invalidate
+it in every worker.
+"""
+
+import os
+from typing import Any, Dict, List
+
+from cache import TableCache, supabase
+
+CONTENT_TABLE = "site_pages_content"
+CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", "300"))
+
+
+class PageContentCache(TableCache):
+    """Sections per page as {section_key: content}, plus the legacy full document"""
+
+    table = CONTENT_TABLE
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self._pages: Dict[str, Dict[str, Any]] = {}
+        self._full: Dict[str, Any] = {}
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        return (
+            supabase.table(self.table)
+            .select("page_slug, section_key, content, is_active, order_index")
+            .order("order_index")
+            .execute()
+            .data
+            or []
+        )
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        pages: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            if row.get("is_active", True):
+                pages.setdefault(row["page_slug"], {})[row["section_key"]] = row["content"]
+        self._pages = pages
+        self._full = {row["section_key"]: row["content"] for row in rows}
+
+    def page(self, page_slug: str) -> Dict[str, Any]:
+        """Active sections of a page in order ({} for an unknown page)"""
+        self.fresh()
+        return self._pages.get(page_slug, {})
+
+    def full(self) -> Dict[str, Any]:
+        """Every section keyed by section_key (legacy site-content.json shape)"""
+        self.fresh()
+        return self._full
+
+
+content_cache = PageContentCache()
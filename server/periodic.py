@@ -0,0 +1,143 @@
+"""
+Periodic tasks
+Asyncio scheduler for recurring in-process work (keep-alive pings, cache
+refreshes, stats snapshots), started and stopped by the server lifespan.
+
+Each task runs in its own loop: sync functions go to the threadpool, async
+ones are awaited. A failure is logged and the task simply runs again at its
+next interval. One httpx.AsyncClient is shared by all tasks for the lifetime
+of the scheduler.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicTask:
+    """A function run every `interval` seconds"""
+    name: str
+    func: Callable
+    interval: float
+    initial_delay: float
+    runs: int = 0
+    failures: int = 0
+    last_run: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class PeriodicScheduler:
+    """
+    Usage:
+        @periodic.every(300, "contacts.refresh_stats")
+        def refresh_contact_stats():
+            ...
+
+        periodic.add("cache.settings", settings_cache.refresh, interval=150)
+    """
+
+    def __init__(self, jitter: float = 0.1, http_timeout: float = 30.0):
+        self.jitter = jitter
+        self.http_timeout = http_timeout
+        self.http: Optional[httpx.AsyncClient] = None
+        self._tasks: Dict[str, PeriodicTask] = {}
+        self._running: List[asyncio.Task] = []
+
+    # ----- registration -----
+
+    def add(self, name: str, func: Callable, interval: float, initial_delay: Optional[float] = None) -> None:
+        """Run func every interval seconds, first after initial_delay (default: one interval)"""
+        if interval <= 0:
+            raise ValueError(f"Interval for periodic task '{name}' must be positive")
+        self._tasks[name] = PeriodicTask(
+            name=name,
+            func=func,
+            interval=interval,
+            initial_delay=interval if initial_delay is None else initial_delay,
+        )
+
+    def every(self, interval: float, name: Optional[str] = None, initial_delay: Optional[float] = None):
+        """Decorator registering a sync or async function as a periodic task"""
+        def decorator(func: Callable) -> Callable:
+            self.add(name or func.__name__, func, interval, initial_delay)
+            return func
+        return decorator
+
+    # ----- running -----
+
+    def _sleep_time(self, base: float) -> float:
+        # Spread tasks with equal intervals so they don't fire together
+        return base + random.uniform(0, base * self.jitter)
+
+    async def _call(self, task: PeriodicTask) -> None:
+        if asyncio.iscoroutinefunction(task.func):
+            await task.func()
+        else:
+            await run_in_threadpool(task.func)
+
+    async def _loop(self, task: PeriodicTask) -> None:
+        await asyncio.sleep(self._sleep_time(task.initial_delay))
+        while True:
+            started = time.monotonic()
+            try:
+                await self._call(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                task.failures += 1
+                task.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Periodic task {task.name} failed: {task.last_error}")
+            else:
+                task.last_error = None
+            task.runs += 1
+            task.last_run = time.time()
+            task.last_duration = time.monotonic() - started
+            await asyncio.sleep(self._sleep_time(task.interval))
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        """Open the shared HTTP client and start every registered task"""
+        if self._running:
+            return
+        self.http = httpx.AsyncClient(timeout=self.http_timeout)
+        self._running = [asyncio.create_task(self._loop(task)) for task in self._tasks.values()]
+        if self._running:
+            logger.info(f"Periodic scheduler started {len(self._running)} task(s): {', '.join(self._tasks)}")
+
+    async def stop(self) -> None:
+        """Cancel all tasks (a run in progress is abandoned) and close the HTTP client"""
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running = []
+        if self.http:
+            await self.http.aclose()
+            self.http = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            task.name: {
+                "interval": task.interval,
+                "runs": task.runs,
+                "failures": task.failures,
+                "last_run": task.last_run,
+                "last_duration": task.last_duration,
+                "last_error": task.last_error,
+            }
+            for task in self._tasks.values()
+        }
+
+
+# Global scheduler (started/stopped by server lifespan)
+periodic = PeriodicScheduler()
@@ -0,0 +1,121 @@
+"""
+Readiness probes
+Dependency checks (database, storage) run in the background on the periodic
+scheduler and their last results are kept in memory, so /ready only reads a
+snapshot and load-balancer polling never reaches the database. A probe that
+is still running (e.g. a hung connection) is skipped rather than stacked.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "checked_at": datetime.fromtimestamp(self.checked_at, timezone.utc).isoformat() if self.checked_at else None,
+        }
+
+
+class Readiness:
+    """
+    Usage:
+        @readiness.probe("supabase")
+        def probe_supabase():
+            supabase.table("site_pages_content").select("id").limit(1).execute()
+
+        periodic.add("readiness", readiness.refresh, interval=readiness.interval, initial_delay=0)
+    """
+
+    def __init__(self, interval: float = 15.0, timeout: float = 5.0):
+        self.interval = interval
+        self.timeout = timeout
+        self._probes: Dict[str, Tuple[Callable, bool]] = {}
+        self._running: Set[str] = set()
+        self.results: Dict[str, ProbeResult] = {}
+        self.checked_at: Optional[float] = None
+
+    def probe(self, name: str, critical: bool = True):
+        """Decorator registering a sync check; it passes unless it raises"""
+        def decorator(func: Callable) -> Callable:
+            self._probes[name] = (func, critical)
+            return func
+        return decorator
+
+    def _timed(self, name: str, func: Callable) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            func()
+            result = ProbeResult(ok=True)
+        except Exception as e:
+            result = ProbeResult(ok=False, error=f"{type(e).__name__}: {e}")
+        finally:
+            self._running.discard(name)
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        result.checked_at = time.time()
+        return result
+
+    async def _run(self, name: str, func: Callable) -> None:
+        if name in self._running:
+            return  # previous run still hanging; its thread reports when done
+        self._running.add(name)
+        task = asyncio.ensure_future(run_in_threadpool(self._timed, name, func))
+        try:
+            self.results[name] = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.results[name] = ProbeResult(
+                ok=False, error=f"Timed out after {self.timeout:g}s", checked_at=time.time()
+            )
+            # Keep the real result once the slow call returns
+            task.add_done_callback(lambda done: self.results.__setitem__(name, done.result()))
+
+    async def refresh(self) -> None:
+        """Run every probe concurrently and store the results"""
+        previous = {name: result.ok for name, result in self.results.items()}
+        await asyncio.gather(*(self._run(name, func) for name, (func, _) in self._probes.items()))
+        self.checked_at = time.time()
+        for name, result in self.results.items():
+            if result.ok != previous.get(name, True):
+                if result.ok:
+                    logger.info(f"Readiness probe {name} recovered")
+                else:
+                    logger.warning(f"Readiness probe {name} failing: {result.error}")
+
+    def status(self) -> Tuple[bool, str]:
+        """(ready, status) from the cached results"""
+        if self.checked_at is None:
+            return False, "starting"
+        if time.time() - self.checked_at > self.interval * 4:
+            return False, "stale"
+        failed = {name for name, result in self.results.items() if not result.ok}
+        if any(self._probes[name][1] for name in failed):
+            return False, "unavailable"
+        return True, "degraded" if failed else "ready"
+
+    def checks(self) -> Dict[str, Dict[str, Any]]:
+        return {name: result.to_dict() for name, result in self.results.items()}
+
+
+# Global readiness state (probes registered in server.py, refreshed by a periodic task)
+readiness = Readiness(
+    interval=float(os.getenv("READY_PROBE_INTERVAL", "15")),
+    timeout=float(os.getenv("READY_PROBE_TIMEOUT", "5")),
+)
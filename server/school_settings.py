@@ -0,0 +1,95 @@
+"""
+School settings cache
+school_settings rows are loaded once and kept in memory (see
+cache.TableCache). Rows are grouped by category, and an upsert through
+update_setting refreshes its entry straight away. Server code can read a
+setting synchronously with settings_cache.get("key").
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from cache import TableCache
+
+SETTINGS_TABLE = "school_settings"
+CACHE_TTL = int(os.getenv("SETTINGS_CACHE_TTL", "300"))
+
+# Category used for rows without one
+DEFAULT_CATEGORY = "general"
+
+
+@dataclass(frozen=True)
+class Setting:
+    key: str
+    value: Any
+    category: str
+    description: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Setting":
+        return cls(
+            key=row["setting_key"],
+            value=row.get("setting_value"),
+            category=row.get("category") or DEFAULT_CATEGORY,
+            description=row.get("description"),
+            updated_at=row.get("updated_at"),
+        )
+
+
+class SettingsCache(TableCache):
+    """All school_settings rows, indexed by key and category"""
+
+    table = SETTINGS_TABLE
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        super().__init__(ttl)
+        self._by_key: Dict[str, Setting] = {}
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _index(self, rows: List[Dict[str, Any]]) -> None:
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_category.setdefault(row.get("category") or DEFAULT_CATEGORY, []).append(row)
+        self._by_key = {row["setting_key"]: Setting.from_row(row) for row in rows}
+        self._by_category = by_category
+
+    def apply(self, row: Dict[str, Any]) -> None:
+        """
+        Replace (or add) one row after a write, without reloading the table
+        here; other worker processes reload on their next read.
+        """
+        with self._lock:
+            rows = [r for r in self.rows if r["setting_key"] != row["setting_key"]]
+            rows.append(row)
+            self._index(rows)
+            self.rows = rows
+            self._seen = self._bump()
+
+    def all(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Raw rows, optionally for one category"""
+        self.fresh()
+        if category:
+            return list(self._by_category.get(category, []))
+        return list(self.rows)
+
+    def grouped(self) -> Dict[str, Dict[str, Any]]:
+        """{category: {setting_key: setting_value}}"""
+        self.fresh()
+        return {
+            category: {row["setting_key"]: row.get("setting_value") for row in rows}
+            for category, rows in self._by_category.items()
+        }
+
+    def setting(self, key: str) -> Optional[Setting]:
+        self.fresh()
+        return self._by_key.get(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value of a setting, or default when it is not set"""
+        setting = self.setting(key)
+        return setting.value if setting else default
+
+
+settings_cache = SettingsCache()
@@ -0,0 +1,45 @@
+"""
+Migration script to add upload de-duplication columns to media_assets
+source_hash: SHA-256 of the bytes as uploaded (before EXIF stripping)
+variants: thumbnail and responsive WebP/AVIF URLs, returned for duplicate uploads
+Run this once to update existing database
+"""
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if not DATABASE_URL:
+    print("ERROR: DATABASE_URL not found in .env file")
+    sys.exit(1)
+
+try:
+    import psycopg2
+    
+    print("Adding source_hash and variants columns to media_assets table...")
+    
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    
+    # Add columns if they don't exist
+    cur.execute("""
+        ALTER TABLE media_assets
+        ADD COLUMN IF NOT EXISTS source_hash CHAR(64),
+        ADD COLUMN IF NOT EXISTS variants JSONB;
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_media_assets_source_hash ON media_assets(source_hash);
+    """)
+    
+    conn.commit()
+    cur.close()
+    conn.close()
+    
+    print("✓ media_assets de-duplication columns added successfully!")
+    
+except Exception as e:
+    print(f"Error: {e}")
+    sys.exit(1)
@@ -0,0 +1,41 @@
+"""
+Migration script to add photo_variants column to students and teachers tables
+Stores thumbnail and responsive WebP/AVIF URLs generated on photo upload
+Run this once to update existing database
+"""
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if not DATABASE_URL:
+    print("ERROR: DATABASE_URL not found in .env file")
+    sys.exit(1)
+
+try:
+    import psycopg2
+    
+    print("Adding photo_variants column to students and teachers tables...")
+    
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    
+    # Add column if it doesn't exist
+    for table in ("students", "teachers"):
+        cur.execute(f"""
+            ALTER TABLE {table} 
+            ADD COLUMN IF NOT EXISTS photo_variants JSONB;
+        """)
+    
+    conn.commit()
+    cur.close()
+    conn.close()
+    
+    print("✓ photo_variants column added successfully!")
+    
+except Exception as e:
+    print(f"Error: {e}")
+    sys.exit(1)
@@ -0,0 +1,110 @@
+"""
+Benchmark JSON serialization of a list_students page.
+
+Compares, for 100 rows with personal_info blobs:
+  1. the old path: validate StudentListResponse + jsonable_encoder + stdlib json
+  2. response_model validation rendered with FastJSONResponse (orjson)
+  3. raw PostgREST rows returned directly as FastJSONResponse (current list_students)
+
+Usage: python scripts/benchmark_json.py [rows] [iterations]
+"""
+import os
+import sys
+import json
+import uuid
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Determine paths
+script_dir = os.path.dirname(os.path.abspath(__file__)) # server/scripts
+server_dir = os.path.dirname(script_dir) # server
+sys.path.insert(0, server_dir)
+
+from serialization import FastJSONResponse, ORJSON_AVAILABLE
+from students.schemas import StudentListResponse
+
+
+def make_rows(count: int) -> list:
+    """Rows shaped like PostgREST output (ISO strings, JSONB as dicts)"""
+    random.seed(42)
+    class_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        created = (now - timedelta(days=random.randint(0, 900))).isoformat() + "+00:00"
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "name": f"Student {i:03d}",
+            "roll_no": str(i + 1),
+            "class_id": class_id,
+            "admission_no": f"ADM{2024000 + i}",
+            "admission_date": "2024-06-01",
+            "photo_url": f"https://example.supabase.co/storage/v1/object/public/photos/students/{i}.jpg",
+            "photo_variants": {
+                "thumbnail": f"https://example.supabase.co/storage/v1/object/public/photos/students/variants/{i}/thumb.webp",
+                "webp": {str(w): f"https://example.supabase.co/.../{i}/{w}.webp" for w in (320, 640, 1024)},
+            },
+            "personal_info": {
+                "phone": f"98765{i:05d}",
+                "email": f"student{i}@example.com",
+                "address": f"{i} Main Road, Sector {i % 20}",
+                "city": "Hyderabad",
+                "state": "Telangana",
+                "pincode": "500001",
+                "dob": "2012-04-15",
+                "gender": random.choice(["male", "female"]),
+                "blood_group": random.choice(["A+", "B+", "O+", "AB+"]),
+                "father_name": f"Father {i}",
+                "mother_name": f"Mother {i}",
+                "guardian_phone": f"91234{i:05d}",
+                "previous_school": "Sunrise Public School",
+                "medical": {"allergies": ["peanuts"] if i % 7 == 0 else [], "notes": "None"},
+                "siblings": [{"name": f"Sibling {i}", "grade": "5"}] if i % 3 == 0 else [],
+            },
+            "is_active": True,
+            "created_at": created,
+            "updated_at": created,
+        })
+    return rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    payload = {"students": make_rows(count), "total": count, "page": 1, "page_size": count}
+
+    def old_path():
+        model = StudentListResponse.model_validate(payload)
+        return JSONResponse(jsonable_encoder(model)).body
+
+    def validated_fast():
+        model = StudentListResponse.model_validate(payload)
+        return FastJSONResponse(model.model_dump(mode="json")).body
+
+    def raw_fast():
+        return FastJSONResponse(payload).body
+
+    # Validated paths produce the same document; the raw path differs only in
+    # timestamp spelling (PostgREST's +00:00 instead of Pydantic's Z)
+    assert json.loads(old_path()) == json.loads(validated_fast())
+    assert [r["id"] for r in json.loads(raw_fast())["students"]] == [r["id"] for r in payload["students"]]
+
+    print(f"{count} rows, {iterations} iterations, orjson={'yes' if ORJSON_AVAILABLE else 'no (stdlib fallback)'}")
+    print(f"payload size: {len(raw_fast()) / 1024:.1f} KB\n")
+    baseline = None
+    for label, fn in [
+        ("response_model + jsonable_encoder + json", old_path),
+        ("response_model + orjson", validated_fast),
+        ("raw rows + orjson", raw_fast),
+    ]:
+        seconds = min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+        baseline = baseline or seconds
+        print(f"  {label:42s} {seconds * 1000:8.3f} ms/response  ({baseline / seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark cold start: time from launching uvicorn to the first successful
+GET /health response.
+
+Each run starts a fresh `uvicorn server:app` process on a free port, polls
+/health every 10 ms and stops the process once it answers. The environment
+(including SUPABASE_URL/SUPABASE_KEY from .env) is passed through unchanged,
+so run it with the same settings as production to include client setup.
+
+Usage: python scripts/benchmark_startup.py [runs]
+"""
+import os
+import sys
+import time
+import socket
+import statistics
+import subprocess
+
+import httpx
+
+# Determine paths
+script_dir = os.path.dirname(os.path.abspath(__file__)) # server/scripts
+server_dir = os.path.dirname(script_dir) # server
+
+TIMEOUT = 60.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response() -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=server_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < TIMEOUT:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {process.returncode}")
+                try:
+                    if client.get(url).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"No response from {url} within {TIMEOUT:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    timings = []
+    for run in range(1, runs + 1):
+        elapsed = time_to_first_response()
+        timings.append(elapsed)
+        print(f"run {run}: {elapsed * 1000:.0f} ms")
+
+    print(f"\nTime to first response over {runs} runs:")
+    print(f"  median {statistics.median(timings) * 1000:.0f} ms")
+    print(f"  min    {min(timings) * 1000:.0f} ms")
+    print(f"  max    {max(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Setup script for media_assets table in Supabase
+Run this script to create the media library index (one row per stored upload)
+"""
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+def setup_media_assets_table():
+    """Create the media_assets table and its search indexes using psycopg2"""
+    import psycopg2
+
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL not set in .env file")
+        sys.exit(1)
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        # Create media_assets table
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS media_assets (
+                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                bucket VARCHAR(100) NOT NULL,
+                path TEXT NOT NULL,
+                name TEXT NOT NULL,
+                folder TEXT NOT NULL DEFAULT '',
+                mimetype VARCHAR(100),
+                size BIGINT,
+                width INTEGER,
+                height INTEGER,
+                content_hash CHAR(64),
+                source_hash CHAR(64),
+                variants JSONB,
+                uploaded_by VARCHAR(255),
+                source VARCHAR(30) DEFAULT 'upload',
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                UNIQUE (bucket, path)
+            );
+        """)
+
+        # Default listing: newest first within a bucket / folder
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_bucket_created ON media_assets(bucket, created_at DESC);
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_bucket_folder ON media_assets(bucket, folder, created_at DESC);
+        """)
+
+        # Sort by size, filter by type, look up by content
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_size ON media_assets(bucket, size DESC);
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_mimetype ON media_assets(mimetype text_pattern_ops);
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_content_hash ON media_assets(content_hash);
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_source_hash ON media_assets(source_hash);
+        """)
+
+        # Substring search on file names (ILIKE '%term%')
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_media_assets_name_trgm ON media_assets USING GIN (name gin_trgm_ops);
+        """)
+
+        conn.commit()
+        print("SUCCESS: media_assets table created successfully!")
+        print("Run POST /api/storage/assets/backfill to index files already in the buckets")
+
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"ERROR: Failed to create media_assets table: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    setup_media_assets_table()
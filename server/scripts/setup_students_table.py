@@ -52,6 +52,7 @@ CREATE TABLE IF NOT EXISTS students (
     admission_no TEXT,
     admission_date DATE DEFAULT CURRENT_DATE,
     photo_url TEXT,
+    photo_variants JSONB,  -- thumbnail + responsive WebP/AVIF URLs
     
     -- Flexible personal info (JSONB)
     -- Teachers can store: contact, address, parents, blood_group, custom fields, etc.
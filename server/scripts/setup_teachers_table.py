@@ -45,6 +45,7 @@ CREATE TABLE IF NOT EXISTS teachers (
     designation TEXT,
     join_date DATE,
     photo_url TEXT,
+    photo_variants JSONB,  -- thumbnail + responsive WebP/AVIF URLs
     status TEXT DEFAULT 'Active',
     
     -- Flexible personal info (JSONB)
@@ -0,0 +1,66 @@
+"""
+JSON serialization
+orjson-backed response class used as the app's default. orjson handles
+datetime, date, UUID and enums natively; Decimal, sets and Pydantic models
+go through _default. Falls back to stdlib json when orjson is not installed.
+"""
+
+import json
+from decimal import Decimal
+from datetime import date, datetime, time
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not serialize on its own"""
+    if isinstance(value, Decimal):
+        # numeric columns can hold NaN/Infinity, which JSON has no literal for
+        if not value.is_finite():
+            return None
+        # Same rule as jsonable_encoder: whole numbers stay ints
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return _default(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_stdlib_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    Route handlers can also return it directly with raw PostgREST rows to skip
+    response-model validation and jsonable_encoder (the rows are already
+    JSON-shaped); the route's response_model then only documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -3,45 +3,23 @@ import json
 import logging
 import sys
 import time
-import threading
+import asyncio
 from datetime import datetime
+from functools import partial
 from fastapi import FastAPI, HTTPException, Request, Depends, Response
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
-from supabase import create_client, Client
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from typing import Dict, Any, List
 
 # Import security middleware
 from security import SecurityHeadersMiddleware
 
-# Self-ping to keep server alive (for platforms like Render)
-def self_ping():
-    """Background thread that pings the server to keep it alive"""
-    import httpx
-    
-    server_url = os.getenv("SERVER_URL")
-    if not server_url:
-        return  # Don't run self-ping if SERVER_URL not configured
-    
-    ping_interval = int(os.getenv("PING_INTERVAL", "300"))  # Default 5 minutes
-    health_url = f"{server_url.rstrip('/')}/health"
-    
-    logger = logging.getLogger(__name__)
-    logger.info(f"Self-ping started: pinging {health_url} every {ping_interval}s")
-    
-    while True:
-        time.sleep(ping_interval)
-        try:
-            with httpx.Client(timeout=30) as client:
-                response = client.get(health_url)
-                if response.status_code == 200:
-                    logger.debug(f"Self-ping successful: {health_url}")
-                else:
-                    logger.warning(f"Self-ping returned status {response.status_code}")
-        except Exception as e:
-            logger.warning(f"Self-ping failed: {e}")
+# Background job queue (started/stopped in lifespan)
+from jobs import job_queue
+from serialization import FastJSONResponse
 
 # Configure logging - ensure output is flushed immediately
 logging.basicConfig(
@@ -72,12 +50,20 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 from contextlib import asynccontextmanager
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
+
+# Process-wide caches (loaded at startup, kept warm by periodic tasks)
+from academic_years import academic_year_cache
+from school_settings import settings_cache
+from page_content import content_cache
+from periodic import periodic
+from readiness import readiness
+from lifecycle import drain, InFlightMiddleware
 
 # Import admin module
 try:
-    from admin import admin_router, get_admin_schema, auth_router, get_auth_schema
+    from admin import admin_router, get_admin_schema, auth_router, get_auth_schema, notices_router, notices_cache
     ADMIN_MODULE_LOADED = True
 except ImportError as e:
     print(f"Warning: Admin module not loaded: {e}")
@@ -147,88 +133,161 @@ except ImportError as e:
     print(f"Warning: Contacts module not loaded: {e}")
     CONTACTS_MODULE_LOADED = False
 
+# Import batch module
+try:
+    from batch import batch_router
+    BATCH_MODULE_LOADED = True
+except ImportError as e:
+    print(f"Warning: Batch module not loaded: {e}")
+    BATCH_MODULE_LOADED = False
+
 
 # NEW TABLE NAME
 TABLE_NAME = "site_pages_content"
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup logic
-    print(f"INFO:     Checking connection to Supabase table '{TABLE_NAME}'...")
-    if not supabase:
-        print("ERROR:    Supabase client not initialized. Check .env file.")
-        yield
-        return
+def is_missing_table(error: Exception) -> bool:
+    error_str = str(error)
+    return "PGRST205" in error_str or "Could not find the table" in error_str or "does not exist" in error_str
 
+
+def check_site_table():
+    """Verify the page content table exists and hint at seeding when empty"""
     try:
-        # Try to verify table existence
         # We limit 1 to minimize data transfer
         response = supabase.table(TABLE_NAME).select("id").limit(1).execute()
         print("INFO:     Successfully connected to Supabase.")
-        
-        # Check if admin tables exist (only verify, don't create)
-        if ADMIN_MODULE_LOADED:
-            DATABASE_URL = os.getenv("DATABASE_URL")
-            if DATABASE_URL:
-                try:
-                    import psycopg2
-                    conn = psycopg2.connect(DATABASE_URL)
-                    cur = conn.cursor()
-                    
-                    # Check if admin tables exist
-                    cur.execute("""
-                        SELECT EXISTS (
-                            SELECT FROM information_schema.tables 
-                            WHERE table_name = 'students'
-                        );
-                    """)
-                    tables_exist = cur.fetchone()[0]
-                    
-                    if tables_exist:
-                        print("INFO:     Admin tables verified successfully.")
-                    else:
-                        print("WARNING:  Admin tables not found. Run 'python scripts/setup_admin_tables.py' to create them.")
-                    
-                    cur.close()
-                    conn.close()
-                except Exception as admin_err:
-                    print(f"WARNING:  Could not verify admin tables: {admin_err}")
-            else:
-                print("WARNING:  DATABASE_URL not set, skipping admin table verification")
-        
-        # Check if table is empty and seed if needed
+
         # Note: Seeding is now optional and should be done via API or separate script
         if len(response.data) == 0:
             print(f"INFO:     Table '{TABLE_NAME}' is empty.")
             print(f"INFO:     To seed data, use the /api/pages/{{page_slug}}/batch endpoint")
             print(f"INFO:     or run the seed_migration.py script manually.")
-                
     except Exception as e:
-        error_str = str(e)
-        if "PGRST205" in error_str or "Could not find the table" in error_str or "does not exist" in error_str:
-             print(f"\n{'='*60}")
-             print(f"ERROR:    Table '{TABLE_NAME}' does not exist in your Supabase project.")
-             print(f"ACTION:   Please run 'python scripts/setup_db.py' to create the table.")
-             print(f"{'='*60}\n")
+        if is_missing_table(e):
+            print(f"\n{'='*60}")
+            print(f"ERROR:    Table '{TABLE_NAME}' does not exist in your Supabase project.")
+            print(f"ACTION:   Please run 'python scripts/setup_db.py' to create the table.")
+            print(f"{'='*60}\n")
         else:
             print(f"ERROR:    Failed to connect to Supabase: {e}")
 
-            
-    # Start self-ping thread in production
+
+def check_admin_tables():
+    """Verify the admin tables exist (only verify, don't create) through the REST API"""
+    try:
+        supabase.table("students").select("id").limit(1).execute()
+        print("INFO:     Admin tables verified successfully.")
+    except Exception as e:
+        if is_missing_table(e):
+            print("WARNING:  Admin tables not found. Run 'python scripts/setup_admin_tables.py' to create them.")
+        else:
+            print(f"WARNING:  Could not verify admin tables: {e}")
+
+
+def table_caches() -> list:
+    """In-memory table caches to warm at startup and keep fresh"""
+    caches = [content_cache, academic_year_cache, settings_cache]
+    if ADMIN_MODULE_LOADED:
+        caches.append(notices_cache)
+    return caches
+
+
+def load_cache(cache):
+    """Warm a table cache so year and settings lookups never wait on the database"""
+    if cache.loaded:
+        return  # inherited from the preloading master process (gunicorn.conf.py)
+    try:
+        cache.load()
+    except Exception as cache_err:
+        print(f"WARNING:  Could not load {cache.table} cache: {cache_err}")
+
+
+async def run_startup_checks():
+    """
+    Probe dependencies and warm caches concurrently, after the app is already
+    serving. Failures are only logged; requests fall back to lazy loading.
+    """
+    started = time.perf_counter()
+    checks = [check_site_table] + [partial(load_cache, cache) for cache in table_caches()]
+    if ADMIN_MODULE_LOADED:
+        checks.append(check_admin_tables)
+    await asyncio.gather(*(run_in_threadpool(check) for check in checks))
+    print(f"INFO:     Startup checks finished in {time.perf_counter() - started:.2f}s")
+
+
+async def self_ping():
+    """Ping /health through the public URL so platforms like Render keep the server alive"""
+    health_url = f"{os.getenv('SERVER_URL').rstrip('/')}/health"
+    response = await periodic.http.get(health_url)
+    if response.status_code != 200:
+        logger.warning(f"Self-ping returned status {response.status_code}")
+
+
+# Readiness probes (run by the periodic scheduler, read by /ready)
+STORAGE_BUCKET = os.getenv("SUPABASE_STORAGE_BUCKET", "site-images")
+
+
+@readiness.probe("supabase")
+def probe_supabase():
+    """PostgREST round trip"""
+    supabase.table(TABLE_NAME).select("id").limit(1).execute()
+
+
+@readiness.probe("storage", critical=False)
+def probe_storage():
+    """Storage API reachable and the bucket exists"""
+    supabase.storage.get_bucket(STORAGE_BUCKET)
+
+
+def register_periodic_tasks():
+    """Keep-warm work: the self-ping in production, readiness probes and cache refreshes"""
     if os.getenv("SERVER_URL"):
-        ping_thread = threading.Thread(target=self_ping, daemon=True)
-        ping_thread.start()
-        print("INFO:     Self-ping background thread started")
+        periodic.add("self_ping", self_ping, interval=int(os.getenv("PING_INTERVAL", "300")))  # Default 5 minutes
+    if supabase:
+        periodic.add("readiness", readiness.refresh, interval=readiness.interval, initial_delay=0)
+        for cache in table_caches():
+            # Reload at half the TTL so requests never find a stale cache
+            periodic.add(f"cache.{cache.table}", cache.refresh, interval=max(30, cache.ttl / 2))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup logic: nothing here waits on the network, so the port opens immediately
+    await job_queue.start()
+
+    startup_checks = None
+    if not supabase:
+        print("ERROR:    Supabase client not initialized. Check .env file.")
+    else:
+        print(f"INFO:     Checking connection to Supabase table '{TABLE_NAME}' in the background...")
+        startup_checks = asyncio.create_task(run_startup_checks())
+
+    # Keep-warm tasks (self-ping, cache and stats refreshes)
+    register_periodic_tasks()
+    await periodic.start()
+
+    # Start draining as soon as the shutdown signal arrives (see lifecycle.py)
+    drain.install_signal_handlers()
     
     yield
-    # Shutdown logic
-
-app = FastAPI(lifespan=lifespan)
+    # Shutdown logic: no new work, let in-flight requests and queued jobs finish by the deadline
+    drain.start()
+    if startup_checks and not startup_checks.done():
+        startup_checks.cancel()
+    await periodic.stop()
+    await drain.wait_idle()
+    job_timeout = float(os.getenv("JOB_QUEUE_SHUTDOWN_TIMEOUT", "10"))
+    await job_queue.stop(timeout=min(job_timeout, drain.remaining()))
+    logger.info(f"Shutdown complete ({job_queue.processed} job(s) processed, {job_queue.depth} left)")
+    drain.flush_logs()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Include admin router if loaded
 if ADMIN_MODULE_LOADED:
     app.include_router(admin_router)
     app.include_router(auth_router)
+    app.include_router(notices_router)
     print("INFO:     Admin and auth routes registered")
 
 # Include editor router if loaded
@@ -271,6 +330,11 @@ if CONTACTS_MODULE_LOADED:
     app.include_router(contacts_router)
     print("INFO:     Contacts routes registered")
 
+# Include batch router if loaded
+if BATCH_MODULE_LOADED:
+    app.include_router(batch_router)
+    print("INFO:     Batch routes registered")
+
 
 # Configure CORS - only allow origins from environment variable
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "localhost:3000")
@@ -363,6 +427,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(RequestLoggingMiddleware)
 
+# Outermost: counts in-flight requests and refuses new ones while draining
+app.add_middleware(InFlightMiddleware, drain=drain)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -392,6 +459,29 @@ def health():
     """Health check endpoint"""
     return "ok"
 
+# Readiness endpoint
+@app.get("/ready")
+async def ready():
+    """
+    Readiness check for load balancers: 200 when the database is reachable,
+    503 otherwise. Reports the last background probe results, cache states
+    and job queue depth; it never queries anything itself.
+    """
+    if drain.draining:
+        is_ready, status = False, "draining"
+    elif not supabase:
+        is_ready, status = False, "not configured"
+    else:
+        is_ready, status = readiness.status()
+    body = {
+        "status": status,
+        "checks": readiness.checks(),
+        "caches": {cache.table: cache.state() for cache in table_caches()},
+        "jobs": job_queue.stats(),
+        "inflight": drain.inflight,
+    }
+    return FastJSONResponse(body, status_code=200 if is_ready else 503, headers={"Cache-Control": "no-store"})
+
 # --- NEW ENDPOINTS ---
 
 @app.get("/api/pages/{page_slug}")
@@ -404,20 +494,8 @@ async def get_page_content(page_slug: str):
         raise HTTPException(status_code=500, detail="Supabase not configured")
     
     try:
-        # Fetch active sections for the page, ordered
-        response = supabase.table(TABLE_NAME)\
-            .select("section_key, content")\
-            .eq("page_slug", page_slug)\
-            .eq("is_active", True)\
-            .order("order_index")\
-            .execute()
-            
-        # Reconstruct into simple dict for frontend
-        data = {}
-        for row in response.data:
-            data[row['section_key']] = row['content']
-            
-        return data  # Returns { "hero": {...}, "facilities": [...] }
+        # Active sections for the page, ordered, from the in-memory snapshot
+        return FastJSONResponse(content_cache.page(page_slug))  # Returns { "hero": {...}, "facilities": [...] }
     except Exception as e:
         print(f"Error fetching page {page_slug}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -432,11 +510,7 @@ async def get_full_content_legacy():
         raise HTTPException(status_code=500, detail="Supabase not configured")
     
     try:
-        response = supabase.table(TABLE_NAME).select("section_key, content").execute()
-        data = {}
-        for row in response.data:
-            data[row['section_key']] = row['content']
-        return data
+        return FastJSONResponse(content_cache.full())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -459,6 +533,7 @@ async def update_section_content(page_slug: str, section_key: str, request: Requ
         }
         
         response = supabase.table(TABLE_NAME).upsert(data_packet, on_conflict="page_slug, section_key").execute()
+        content_cache.invalidate()
         
         return {"success": True, "data": response.data}
     except Exception as e:
@@ -492,6 +567,7 @@ async def batch_update_sections(page_slug: str, request: Request):
         
         # Batch upsert
         response = supabase.table(TABLE_NAME).upsert(records, on_conflict="page_slug, section_key").execute()
+        content_cache.invalidate()
         
         return {"success": True, "updated": len(records), "data": response.data}
     except Exception as e:
@@ -500,7 +576,17 @@ async def batch_update_sections(page_slug: str, request: Request):
 
 
 if __name__ == "__main__":
+    # Production: hand over to gunicorn's pre-forked workers (see gunicorn.conf.py)
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+    if gunicorn and os.name == "posix" and os.getenv("WEB_CONCURRENCY") != "1":
+        server_dir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(server_dir)
+        os.execv(sys.executable, [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"])
+
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port, timeout_graceful_shutdown=int(drain.timeout))
 
@@ -3,4 +3,12 @@
 
 echo "Starting FastAPI server..."
 export PYTHONUNBUFFERED=1
-uvicorn server:app --host 0.0.0.0 --port ${PORT:-8000} --log-level info
+
+# Pre-forked uvicorn workers sharing preloaded caches (settings in gunicorn.conf.py).
+# WEB_CONCURRENCY=1 runs a single uvicorn process instead.
+if [ "${WEB_CONCURRENCY:-}" != "1" ] && python -c "import gunicorn" 2>/dev/null; then
+    exec gunicorn -c gunicorn.conf.py server:app
+fi
+
+# In-flight requests get SHUTDOWN_TIMEOUT seconds to finish on redeploy (see lifecycle.py)
+exec uvicorn server:app --host 0.0.0.0 --port ${PORT:-8000} --log-level info --timeout-graceful-shutdown ${SHUTDOWN_TIMEOUT:-25}
@@ -2,5 +2,6 @@
 Storage module
 """
 from .router import storage_router
+from . import tasks, assets  # registers background jobs
 
 __all__ = ["storage_router"]
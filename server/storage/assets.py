@@ -0,0 +1,266 @@
+"""
+Media asset index
+Every stored upload gets a row in media_assets (path, type, size,
+dimensions, content hash, uploader), so the media library can search, sort
+and filter in the database instead of listing buckets. Rows are written by
+background jobs after the upload response; the backfill job indexes files
+stored before the table existed.
+
+Editor uploads are de-duplicated by content: the upload is hashed as it is
+read (source_hash) and an upload whose bytes are already stored in the bucket
+returns the existing object instead of writing a copy.
+
+Variants (variants/ folders) are renditions of an indexed original and are
+not indexed themselves.
+"""
+import os
+import sys
+import hashlib
+import logging
+import posixpath
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import supabase
+from jobs import job_queue
+from bulk import chunked
+from exports import iter_keyset
+from admin.auth_utils import TokenData
+
+from .images import image_size
+from .listing import PAGE_SIZE
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+ASSETS_TABLE = "media_assets"
+ASSET_COLUMNS = "id,bucket,path,name,folder,mimetype,size,width,height,content_hash,source_hash,variants,uploaded_by,source,created_at,updated_at"
+
+# Folder name used for generated variants (see images.variant_path)
+VARIANTS_FOLDER = "variants"
+
+# Placeholder object the storage dashboard creates for empty folders
+PLACEHOLDER = ".emptyFolderPlaceholder"
+
+# Bytes read (and hashed) per step when reading an upload
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Indexed copies of the same bytes checked for a live object before uploading anew
+DUPLICATE_CANDIDATES = 5
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest of the stored bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+
+async def read_upload(file: UploadFile, max_size: int) -> Tuple[bytes, str]:
+    """
+    Read an upload in chunks, hashing as it goes, and return (content, sha256 hex)
+
+    Raises:
+        ValueError: As soon as the upload is larger than max_size
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise ValueError(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def find_duplicate(bucket: str, digest: str) -> Optional[Dict[str, Any]]:
+    """
+    Oldest indexed object in a bucket with these bytes, either as uploaded
+    (source_hash, before EXIF stripping) or as stored (content_hash).
+
+    Each hit is confirmed in storage first: rows whose object is gone
+    (deleted in the dashboard, or a delete whose index cleanup hasn't run
+    yet) are dropped and skipped.
+    """
+    result = (
+        supabase.table(ASSETS_TABLE)
+        .select(ASSET_COLUMNS)
+        .eq("bucket", bucket)
+        .or_(f"source_hash.eq.{digest},content_hash.eq.{digest}")
+        .order("created_at")
+        .limit(DUPLICATE_CANDIDATES)
+        .execute()
+    )
+    api = supabase.storage.from_(bucket)
+    missing = []
+    found = None
+    for row in result.data or []:
+        if api.exists(row["path"]):
+            found = row
+            break
+        missing.append(row["path"])
+    if missing:
+        logger.info(f"Dropping {len(missing)} index row(s) for objects missing from {bucket}")
+        forget_assets(bucket, missing)
+    return found
+
+
+def uploader(user: Optional[TokenData]) -> Optional[str]:
+    """What is recorded as uploaded_by for a (possibly anonymous) request"""
+    if not user:
+        return None
+    return user.email or user.username or str(user.user_id)
+
+
+def _location(bucket: str, path: str) -> Dict[str, str]:
+    folder, name = posixpath.split(path)
+    return {"bucket": bucket, "path": path, "name": name, "folder": folder}
+
+
+def asset_row(
+    bucket: str,
+    path: str,
+    content: bytes,
+    mimetype: Optional[str],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    uploaded_by: Optional[str] = None,
+    source: str = "upload",
+    source_hash: Optional[str] = None,
+    variants: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """media_assets row for bytes just written to bucket/path"""
+    if width is None and mimetype and mimetype.startswith("image/"):
+        width, height = image_size(content) or (None, None)
+    return {
+        **_location(bucket, path),
+        "mimetype": mimetype,
+        "size": len(content),
+        "width": width,
+        "height": height,
+        "content_hash": content_hash(content),
+        "source_hash": source_hash,
+        "variants": variants,
+        "uploaded_by": uploaded_by,
+        "source": source,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def record_asset(*args, **kwargs) -> str:
+    """Index an upload in the background (same arguments as asset_row); returns the job id"""
+    return job_queue.enqueue("media.record", {"rows": [asset_row(*args, **kwargs)]})
+
+
+def forget_assets(bucket: str, paths: List[str]) -> None:
+    """Drop index rows for objects removed from a bucket"""
+    for chunk in chunked(paths):
+        supabase.table(ASSETS_TABLE).delete().eq("bucket", bucket).in_("path", chunk).execute()
+
+
+@job_queue.handler("media.record")
+def record_assets(payload: dict):
+    """
+    Upsert index rows (re-uploads to the same path replace the row)
+    Payload: { "rows": [asset_row(...), ...] }
+    """
+    rows = payload.get("rows") or []
+    if rows and supabase:
+        supabase.table(ASSETS_TABLE).upsert(rows, on_conflict="bucket,path").execute()
+
+
+@job_queue.handler("media.forget")
+def forget_assets_job(payload: dict):
+    """
+    Payload: { "bucket": "site-images", "paths": [...] }
+    """
+    if payload.get("paths") and supabase:
+        forget_assets(payload["bucket"], payload["paths"])
+
+
+def _walk(api, folder: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(path, object) for every stored file under a folder, skipping variants"""
+    offset = 0
+    while True:
+        page = api.list(folder, {"limit": PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}})
+        for entry in page:
+            name = entry.get("name")
+            if not name or name == PLACEHOLDER:
+                continue
+            path = f"{folder}/{name}" if folder else name
+            if entry.get("id") is None:
+                if name != VARIANTS_FOLDER:
+                    yield from _walk(api, path)
+            else:
+                yield path, entry
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+@job_queue.handler("media.backfill")
+def backfill_assets(payload: dict):
+    """
+    Index files already in a bucket
+    Payload: { "bucket": "site-images", "hash": false }
+
+    New files are inserted from their storage metadata. With "hash", every
+    file still missing a content hash is downloaded to fill in the hash and
+    image dimensions (slow on large buckets). Existing rows keep their
+    uploader and source. Safe to re-run.
+    """
+    if not supabase:
+        return
+    bucket_name = payload["bucket"]
+    with_hash = bool(payload.get("hash"))
+    api = supabase.storage.from_(bucket_name)
+
+    indexed = {
+        row["path"]: row.get("content_hash")
+        for row in iter_keyset(lambda: supabase.table(ASSETS_TABLE).select("id,path,content_hash").eq("bucket", bucket_name))
+    }
+
+    new_rows: List[Dict[str, Any]] = []
+    hashed_rows: List[Dict[str, Any]] = []
+    for path, entry in _walk(api):
+        if path in indexed and (indexed[path] or not with_hash):
+            continue
+        metadata = entry.get("metadata") or {}
+        mimetype = metadata.get("mimetype")
+
+        if with_hash:
+            content = api.download(path)
+            row = asset_row(bucket_name, path, content, mimetype, source="backfill")
+            if path in indexed:
+                hashed_rows.append({key: row[key] for key in ("bucket", "path", "name", "folder", "content_hash", "width", "height", "updated_at")})
+                continue
+        else:
+            row = {
+                **_location(bucket_name, path),
+                "mimetype": mimetype,
+                "size": metadata.get("size"),
+                "width": None,
+                "height": None,
+                "content_hash": None,
+                "uploaded_by": None,
+                "source": "backfill",
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+        row["created_at"] = entry.get("created_at") or entry.get("updated_at") or row["updated_at"]
+        new_rows.append(row)
+
+    # Rows of one upsert must share the same keys
+    for rows in (new_rows, hashed_rows):
+        for chunk in chunked(rows):
+            supabase.table(ASSETS_TABLE).upsert(chunk, on_conflict="bucket,path").execute()
+
+    logger.info(
+        f"Backfilled {bucket_name}: {len(new_rows)} new asset(s), {len(hashed_rows)} hashed, "
+        f"{len(indexed)} already indexed"
+    )
@@ -0,0 +1,213 @@
+"""
+Image processing for uploads
+Re-encodes uploaded photos without EXIF metadata and generates responsive
+WebP/AVIF variants at standard widths plus a square thumbnail.
+"""
+import io
+import os
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not installed - uploaded images will be stored without variants")
+
+# Standard responsive widths (px); widths larger than the source are skipped
+VARIANT_WIDTHS = (320, 640, 1024, 1600)
+THUMBNAIL_SIZE = 256
+MAX_ORIGINAL_DIMENSION = 2560
+
+WEBP_QUALITY = 80
+AVIF_QUALITY = 55
+JPEG_QUALITY = 88
+
+# Animated GIFs and SVGs are stored untouched
+PROCESSABLE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+AVIF_AVAILABLE = PIL_AVAILABLE and features.check("avif")
+
+FORMAT_CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+
+
+@dataclass
+class ImageVariant:
+    """A single encoded rendition of an uploaded image"""
+    name: str  # e.g. "w640" or "thumbnail"
+    format: str  # webp / avif
+    width: int
+    height: int
+    data: bytes
+
+    @property
+    def content_type(self) -> str:
+        return FORMAT_CONTENT_TYPES[self.format]
+
+
+@dataclass
+class ProcessedImage:
+    """Result of processing an upload: cleaned original plus its variants"""
+    original: bytes
+    width: int
+    height: int
+    variants: List[ImageVariant]
+
+
+def can_process(content_type: Optional[str]) -> bool:
+    """Check whether an upload of this type gets variants generated"""
+    return PIL_AVAILABLE and content_type in PROCESSABLE_TYPES
+
+
+def _encode(image: "Image.Image", fmt: str) -> bytes:
+    """Encode an image without any metadata"""
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif fmt == "avif":
+        image.save(buffer, "AVIF", quality=AVIF_QUALITY)
+    elif fmt == "jpeg":
+        image.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _open(content: bytes) -> "Image.Image":
+    """Decode an image, apply its EXIF orientation and normalise the mode"""
+    try:
+        image = Image.open(io.BytesIO(content))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"Could not decode image: {e}")
+
+    # Apply EXIF orientation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    return image
+
+
+def _clean(image: "Image.Image", content_type: str) -> bytes:
+    """Re-encode the original (capped in size) so EXIF/GPS data is not stored"""
+    if max(image.size) > MAX_ORIGINAL_DIMENSION:
+        image.thumbnail((MAX_ORIGINAL_DIMENSION, MAX_ORIGINAL_DIMENSION), Image.LANCZOS)
+    original_format = {"image/jpeg": "jpeg", "image/png": "png", "image/webp": "webp"}[content_type]
+    return _encode(image, original_format)
+
+
+def _variants(image: "Image.Image") -> List[ImageVariant]:
+    formats = ["webp"] + (["avif"] if AVIF_AVAILABLE else [])
+    width, height = image.size
+    variants = []
+
+    for target_width in VARIANT_WIDTHS:
+        if target_width >= width:
+            break
+        target_height = max(1, round(height * target_width / width))
+        resized = image.resize((target_width, target_height), Image.LANCZOS)
+        for fmt in formats:
+            variants.append(ImageVariant(f"w{target_width}", fmt, target_width, target_height, _encode(resized, fmt)))
+
+    # Full-size modern formats so srcset always has a top entry
+    for fmt in formats:
+        variants.append(ImageVariant(f"w{width}", fmt, width, height, _encode(image, fmt)))
+
+    thumbnail = ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    variants.append(ImageVariant("thumbnail", "webp", THUMBNAIL_SIZE, THUMBNAIL_SIZE, _encode(thumbnail, "webp")))
+    return variants
+
+
+def image_size(content: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the image header, or None when it can't be read (video, SVG, no Pillow)"""
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def clean_image(content: bytes, content_type: str) -> bytes:
+    """
+    Strip metadata from an image without generating variants.
+    CPU bound - call through run_in_threadpool from async handlers.
+
+    Raises:
+        ValueError: If the content cannot be decoded as an image
+    """
+    return _clean(_open(content), content_type)
+
+
+def build_variants(content: bytes) -> List[ImageVariant]:
+    """
+    Build responsive variants from an already cleaned image (used by background jobs).
+
+    Raises:
+        ValueError: If the content cannot be decoded as an image
+    """
+    return _variants(_open(content))
+
+
+def process_image(content: bytes, content_type: str) -> ProcessedImage:
+    """
+    Strip metadata from an image and build its responsive variants.
+    CPU bound - call through run_in_threadpool from async handlers.
+
+    Raises:
+        ValueError: If the content cannot be decoded as an image
+    """
+    image = _open(content)
+    original = _clean(image, content_type)
+    width, height = image.size
+    return ProcessedImage(original=original, width=width, height=height, variants=_variants(image))
+
+
+def variant_path(original_path: str, variant: ImageVariant) -> str:
+    """Storage path for a variant, e.g. students/variants/<id>/w640.webp"""
+    folder, filename = os.path.split(original_path)
+    stem = os.path.splitext(filename)[0]
+    prefix = f"{folder}/variants" if folder else "variants"
+    return f"{prefix}/{stem}/{variant.name}.{variant.format}"
+
+
+def upload_variants(bucket, original_path: str, variants: List[ImageVariant]) -> Dict:
+    """
+    Upload variants next to the original and return their public URLs:
+    { "thumbnail": url, "webp": { "640": url, ... }, "avif": { ... } }
+    """
+    urls: Dict = {}
+    for variant in variants:
+        path = variant_path(original_path, variant)
+        bucket.upload(path, variant.data, {"content-type": variant.content_type, "upsert": "true"})
+        public_url = bucket.get_public_url(path)
+
+        if variant.name == "thumbnail":
+            urls["thumbnail"] = public_url
+        else:
+            urls.setdefault(variant.format, {})[str(variant.width)] = public_url
+    return urls
+
+
+def flatten_variant_urls(variants: Optional[Dict]) -> List[str]:
+    """All URLs recorded in a variants dict (used when deleting old photos)"""
+    if not variants:
+        return []
+    urls = []
+    for value in variants.values():
+        if isinstance(value, dict):
+            urls.extend(value.values())
+        elif isinstance(value, str):
+            urls.append(value)
+    return urls
@@ -0,0 +1,117 @@
+"""
+Storage listing cache
+Folder listings are fetched once (all pages) and kept in memory, so opening
+the media library is a memory read. Public URLs are built locally from the
+bucket's base URL instead of going through the storage client per file.
+
+Any write to a bucket (upload, delete, variant generation) calls
+invalidate(). The counter lives in shared memory, so every worker process
+re-lists on its next read.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import supabase
+
+CACHE_TTL = int(os.getenv("STORAGE_LISTING_TTL", "300"))
+
+# Objects fetched per storage list call, and the most kept for one folder
+PAGE_SIZE = 1000
+MAX_OBJECTS = 20000
+
+# Characters the storage client leaves unescaped in object paths
+_SAFE = "/!$&'()*+,;=:@"
+
+
+def format_file(file: Dict[str, Any], path: str, url: str) -> Dict[str, Any]:
+    metadata = file.get("metadata") or {}
+    return {
+        "id": file.get("id"),
+        "name": file.get("name"),
+        "path": path,
+        "url": url,
+        "size": metadata.get("size", 0),
+        "mimetype": metadata.get("mimetype", ""),
+        "created_at": file.get("created_at"),
+        "updated_at": file.get("updated_at"),
+    }
+
+
+@dataclass
+class Listing:
+    files: List[Dict[str, Any]]
+    loaded_at: float
+    generation: int
+
+
+class ListingCache:
+    """Files per (bucket, folder), newest listing within CACHE_TTL"""
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        self.ttl = ttl
+        self._listings: Dict[Tuple[str, str], Listing] = {}
+        self._bases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._generation = multiprocessing.Value("L", 0)
+
+    def public_url(self, bucket: str, path: str) -> str:
+        """Same URL as get_public_url(path), without the client round trip per file"""
+        base = self._bases.get(bucket)
+        if base is None:
+            marker = "__base__"
+            base = supabase.storage.from_(bucket).get_public_url(marker)[: -len(marker)]
+            self._bases[bucket] = base
+        return base + quote(path, safe=_SAFE)
+
+    def _fetch(self, bucket: str, folder: str) -> List[Dict[str, Any]]:
+        api = supabase.storage.from_(bucket)
+        files = []
+        offset = 0
+        while offset < MAX_OBJECTS:
+            page = api.list(folder, {"limit": PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}})
+            for file in page:
+                if file.get("name") and file.get("id") is not None:  # Skip folders
+                    path = f"{folder}/{file['name']}" if folder else file["name"]
+                    files.append(format_file(file, path, self.public_url(bucket, path)))
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        return files
+
+    def _current(self, listing: Optional[Listing]) -> bool:
+        return (
+            listing is not None
+            and listing.generation == self._generation.value
+            and time.monotonic() - listing.loaded_at < self.ttl
+        )
+
+    def files(self, bucket: str, folder: str = "") -> List[Dict[str, Any]]:
+        """All files directly in a folder, sorted by name"""
+        key = (bucket, folder)
+        listing = self._listings.get(key)
+        if self._current(listing):
+            return listing.files
+        with self._lock:
+            listing = self._listings.get(key)
+            if self._current(listing):
+                return listing.files
+            generation = self._generation.value
+            listing = Listing(files=self._fetch(bucket, folder), loaded_at=time.monotonic(), generation=generation)
+            self._listings[key] = listing
+            return listing.files
+
+    def invalidate(self) -> None:
+        """Re-list on the next read, in every worker process (never waits on a fetch)"""
+        with self._generation.get_lock():
+            self._generation.value += 1
+
+
+listing_cache = ListingCache()
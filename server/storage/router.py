@@ -1,15 +1,18 @@
 """
 Storage API Router
-Operations for Supabase storage buckets (list, delete, download images)
+Operations for Supabase storage buckets (list, delete, move, download images)
 All routes require authentication
 """
 import os
 import re
 import logging
-from typing import Optional
+import posixpath
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Literal, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Query, Depends
 from fastapi.responses import RedirectResponse
-from supabase import create_client, Client
+from starlette.concurrency import run_in_threadpool
 
 # Import authentication utilities
 import sys
@@ -19,13 +22,22 @@ from admin.auth_utils import get_current_user, require_admin, TokenData
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
+
+from .listing import listing_cache
+from .signed import signed_urls
+from .assets import ASSETS_TABLE, ASSET_COLUMNS, forget_assets
+from .schemas import BatchDeleteRequest, BatchMoveRequest, BatchItemResult, BatchOperationResponse
+from jobs import job_queue
+from serialization import FastJSONResponse
 
 BUCKET_NAME = "site-images"
 
+# Paths per storage remove call, and moves running at the same time
+STORAGE_BATCH_SIZE = 100
+MOVE_CONCURRENCY = int(os.getenv("STORAGE_MOVE_CONCURRENCY", "8"))
+
 storage_router = APIRouter(prefix="/api/storage", tags=["Storage"])
 
 
@@ -68,31 +80,15 @@ async def list_images(
 ):
     """
     List all images from the site-images bucket (requires authentication)
+    Served from the folder listing cache; uploads and deletes invalidate it.
     """
     check_supabase()
     
     try:
         # Sanitize folder path
-        path = sanitize_file_path(folder) if folder else ""
-        result = supabase.storage.from_(BUCKET_NAME).list(path, {"limit": limit, "offset": offset})
-        
-        # Format response with public URLs
-        images = []
-        for file in result:
-            if file.get("name") and not file.get("id") is None:  # Skip folders
-                file_path = f"{path}/{file['name']}" if path else file["name"]
-                public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
-                
-                images.append({
-                    "id": file.get("id"),
-                    "name": file.get("name"),
-                    "path": file_path,
-                    "url": public_url,
-                    "size": file.get("metadata", {}).get("size", 0),
-                    "mimetype": file.get("metadata", {}).get("mimetype", ""),
-                    "created_at": file.get("created_at"),
-                    "updated_at": file.get("updated_at"),
-                })
+        path = sanitize_file_path(folder).rstrip("/") if folder else ""
+        files = await run_in_threadpool(listing_cache.files, BUCKET_NAME, path)
+        images = files[offset:offset + limit]
         
         return {
             "images": images,
@@ -105,6 +101,89 @@ async def list_images(
         raise HTTPException(status_code=500, detail="Failed to list images")
 
 
+def sanitize_search(search: str) -> str:
+    """
+    Sanitize search parameter to prevent injection via PostgREST filters
+    """
+    if not search:
+        return ""
+    sanitized = re.sub(r'[^\w\s\-.]', '', search)
+    return sanitized.strip()
+
+
+@storage_router.get("/assets")
+async def list_assets(
+    search: Optional[str] = Query(None, description="Substring of the file name"),
+    bucket: Optional[str] = Query(None, description="Bucket (all buckets if omitted)"),
+    folder: Optional[str] = Query(None, description="Exact folder path within the bucket"),
+    mimetype: Optional[str] = Query(None, description="Exact type (image/png) or prefix (image/)"),
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    sort: Literal["created_at", "size", "name"] = Query("created_at"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Search the media library index (requires authentication)
+    Served from the media_assets table, so filtering and sorting are indexed queries
+    """
+    check_supabase()
+
+    try:
+        query = supabase.table(ASSETS_TABLE).select(ASSET_COLUMNS, count="exact")
+        if bucket:
+            query = query.eq("bucket", bucket)
+        if folder is not None:
+            query = query.eq("folder", sanitize_file_path(folder).rstrip("/"))
+        if mimetype:
+            safe_type = re.sub(r'[^\w/+.\-]', '', mimetype)
+            query = query.like("mimetype", f"{safe_type}%") if safe_type.endswith("/") else query.eq("mimetype", safe_type)
+        if min_size is not None:
+            query = query.gte("size", min_size)
+        if max_size is not None:
+            query = query.lte("size", max_size)
+        if search:
+            safe_search = sanitize_search(search)
+            if safe_search:
+                query = query.ilike("name", f"%{safe_search}%")
+
+        result = await run_in_threadpool(
+            query.order(sort, desc=order == "desc").order("id").range(offset, offset + limit - 1).execute
+        )
+        assets = result.data or []
+        for asset in assets:
+            asset["url"] = listing_cache.public_url(asset["bucket"], asset["path"])
+
+        return FastJSONResponse({
+            "assets": assets,
+            "total": result.count or 0,
+            "limit": limit,
+            "offset": offset,
+        })
+    except Exception as e:
+        logger.error(f"Error listing assets: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list assets")
+
+
+@storage_router.post("/assets/backfill", status_code=202)
+async def backfill_assets(
+    bucket: str = Query(BUCKET_NAME, description="Bucket to index"),
+    with_hash: bool = Query(False, alias="hash", description="Download files to record content hash and dimensions"),
+    current_user: TokenData = Depends(require_admin)
+):
+    """
+    Index files already in a bucket into media_assets (requires admin role)
+    Runs as a background job; re-running only adds what is missing
+    """
+    check_supabase()
+
+    job_id = job_queue.enqueue("media.backfill", {"bucket": bucket, "hash": with_hash}, max_attempts=1)
+    logger.info(f"Asset backfill of {bucket} queued by {current_user.email}")
+    return {"job_id": job_id, "bucket": bucket, "hash": with_hash}
+
+
 @storage_router.get("/images/{file_path:path}/download")
 async def download_image(
     file_path: str,
@@ -112,6 +191,7 @@ async def download_image(
 ):
     """
     Get download URL for an image (requires authentication)
+    Signed URLs are cached per path for part of their lifetime (see signed.py)
     """
     check_supabase()
     
@@ -121,15 +201,11 @@ async def download_image(
         raise HTTPException(status_code=400, detail="Invalid file path")
     
     try:
-        # Create a signed URL for download (valid for 1 hour)
-        signed_url = supabase.storage.from_(BUCKET_NAME).create_signed_url(safe_path, 3600)
-        
-        if signed_url and signed_url.get("signedURL"):
-            return RedirectResponse(url=signed_url["signedURL"])
-        else:
-            raise HTTPException(status_code=404, detail="Could not generate download URL")
-    except HTTPException:
-        raise
+        # Signed URL valid for 1 hour, reused while most of that is left
+        url, reusable_for = await run_in_threadpool(signed_urls.get, BUCKET_NAME, safe_path)
+        return RedirectResponse(url=url, headers={"Cache-Control": f"private, max-age={reusable_for}"})
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Could not generate download URL")
     except Exception as e:
         logger.error(f"Error generating download URL: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate download URL")
@@ -153,6 +229,9 @@ async def delete_image(
     try:
         # Delete the file
         result = supabase.storage.from_(BUCKET_NAME).remove([safe_path])
+        listing_cache.invalidate()
+        signed_urls.forget(BUCKET_NAME, [safe_path])
+        job_queue.enqueue("media.forget", {"bucket": BUCKET_NAME, "paths": [safe_path]})
         
         logger.info(f"Deleted image: {safe_path} by user {current_user.email}")
         return {
@@ -165,6 +244,148 @@ async def delete_image(
         raise HTTPException(status_code=500, detail="Failed to delete image")
 
 
+def _error_message(error: Exception) -> str:
+    return getattr(error, "message", None) or str(error)
+
+
+def _batch_response(results: List[BatchItemResult]) -> BatchOperationResponse:
+    succeeded = sum(1 for result in results if result.success)
+    return BatchOperationResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+def _delete_paths(paths: List[str]) -> Tuple[List[BatchItemResult], List[str]]:
+    """
+    Remove paths in chunks, then drop them from the index and caches (runs in a worker thread)
+    Returns the per-path results and the deleted paths whose index rows could not be removed
+    """
+    results = {}
+    targets = []
+    for path in paths:
+        safe_path = sanitize_file_path(path)
+        if not safe_path:
+            results[path] = BatchItemResult(path=path, success=False, error="Invalid file path")
+        elif safe_path not in targets:
+            targets.append(safe_path)
+
+    bucket = supabase.storage.from_(BUCKET_NAME)
+    deleted = []
+    for start in range(0, len(targets), STORAGE_BATCH_SIZE):
+        chunk = targets[start:start + STORAGE_BATCH_SIZE]
+        try:
+            removed = {obj.get("name") for obj in bucket.remove(chunk) or []}
+        except Exception as e:
+            logger.error(f"Batch delete of {len(chunk)} image(s) failed: {e}")
+            for path in chunk:
+                results[path] = BatchItemResult(path=path, success=False, error=_error_message(e))
+            continue
+        for path in chunk:
+            if path in removed:
+                deleted.append(path)
+                results[path] = BatchItemResult(path=path, success=True)
+            else:
+                results[path] = BatchItemResult(path=path, success=False, error="File not found")
+
+    unindexed = []
+    if deleted:
+        listing_cache.invalidate()
+        signed_urls.forget(BUCKET_NAME, deleted)
+        try:
+            forget_assets(BUCKET_NAME, deleted)
+        except Exception as e:
+            logger.warning(f"Could not update media index, retrying in background: {e}")
+            unindexed = deleted
+
+    return [results.get(path) or results[sanitize_file_path(path)] for path in paths], unindexed
+
+
+def _move_one(source: str, destination: str) -> BatchItemResult:
+    """Move one object and re-point its index row"""
+    try:
+        supabase.storage.from_(BUCKET_NAME).move(source, destination)
+    except Exception as e:
+        return BatchItemResult(path=source, destination=destination, success=False, error=_error_message(e))
+
+    folder, name = posixpath.split(destination)
+    try:
+        supabase.table(ASSETS_TABLE).update({
+            "path": destination,
+            "name": name,
+            "folder": folder,
+            "updated_at": datetime.utcnow().isoformat(),
+        }).eq("bucket", BUCKET_NAME).eq("path", source).execute()
+    except Exception as e:
+        logger.warning(f"Moved {source} but could not update media index: {e}")
+    return BatchItemResult(path=source, destination=destination, success=True)
+
+
+def _move_paths(moves: List[tuple]) -> List[BatchItemResult]:
+    """Run the moves with bounded concurrency, then refresh caches (runs in a worker thread)"""
+    with ThreadPoolExecutor(max_workers=MOVE_CONCURRENCY) as executor:
+        results = list(executor.map(lambda move: _move_one(*move), moves))
+
+    moved = [result.path for result in results if result.success]
+    if moved:
+        listing_cache.invalidate()
+        signed_urls.forget(BUCKET_NAME, moved)
+    return results
+
+
+@storage_router.post("/images/batch-delete", response_model=BatchOperationResponse)
+async def batch_delete_images(
+    batch: BatchDeleteRequest,
+    current_user: TokenData = Depends(require_admin)
+):
+    """
+    Delete up to 1000 images in one request (requires admin role)
+    Results are per path, in request order; one failing path doesn't stop the rest
+    """
+    check_supabase()
+
+    results, unindexed = await run_in_threadpool(_delete_paths, batch.paths)
+    if unindexed:
+        # Enqueued here, on the event loop the job queue belongs to
+        job_queue.enqueue("media.forget", {"bucket": BUCKET_NAME, "paths": unindexed})
+    response = _batch_response(results)
+    logger.info(f"Batch deleted {response.succeeded}/{len(results)} image(s) by user {current_user.email}")
+    return response
+
+
+@storage_router.post("/images/batch-move", response_model=BatchOperationResponse)
+async def batch_move_images(
+    batch: BatchMoveRequest,
+    current_user: TokenData = Depends(require_admin)
+):
+    """
+    Move or rename up to 200 images in one request (requires admin role)
+    Each move is independent and fails if the destination exists. Variants stay
+    at their original paths (URLs already recorded keep working).
+    """
+    check_supabase()
+
+    results: List[Optional[BatchItemResult]] = []
+    moves = []
+    seen = set()
+    for move in batch.moves:
+        source = sanitize_file_path(move.source)
+        destination = sanitize_file_path(move.destination).rstrip("/")
+        if not source or not destination:
+            results.append(BatchItemResult(path=move.source, destination=move.destination, success=False, error="Invalid file path"))
+        elif source == destination:
+            results.append(BatchItemResult(path=source, destination=destination, success=False, error="Source and destination are the same"))
+        elif source in seen or destination in seen:
+            results.append(BatchItemResult(path=source, destination=destination, success=False, error="Path used more than once in this batch"))
+        else:
+            seen.update((source, destination))
+            moves.append((source, destination))
+            results.append(None)
+
+    moved = iter(await run_in_threadpool(_move_paths, moves))
+    results = [result or next(moved) for result in results]
+    response = _batch_response(results)
+    logger.info(f"Batch moved {response.succeeded}/{len(results)} image(s) by user {current_user.email}")
+    return response
+
+
 @storage_router.get("/buckets")
 async def list_buckets(
     current_user: TokenData = Depends(require_admin)
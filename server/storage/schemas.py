@@ -0,0 +1,39 @@
+"""
+Storage API Pydantic schemas
+"""
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+MAX_BATCH_DELETE = 1000
+MAX_BATCH_MOVE = 200
+
+
+class BatchDeleteRequest(BaseModel):
+    """Paths (within the bucket) to delete"""
+    paths: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_DELETE)
+
+
+class StorageMove(BaseModel):
+    """A single move/rename within the bucket"""
+    source: str = Field(..., min_length=1, max_length=1024)
+    destination: str = Field(..., min_length=1, max_length=1024)
+
+
+class BatchMoveRequest(BaseModel):
+    """Moves to apply, each one independently"""
+    moves: List[StorageMove] = Field(..., min_length=1, max_length=MAX_BATCH_MOVE)
+
+
+class BatchItemResult(BaseModel):
+    """Outcome for one path (same order as the request)"""
+    path: str
+    destination: Optional[str] = None
+    success: bool
+    error: Optional[str] = None
+
+
+class BatchOperationResponse(BaseModel):
+    """Per-item results plus totals"""
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
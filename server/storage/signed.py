@@ -0,0 +1,92 @@
+"""
+Signed URL cache
+Each signed URL is valid for SIGNED_URL_EXPIRES seconds but is only handed
+out for the first SIGNED_URL_REUSE fraction of that time, so a redirect
+always leaves the client plenty of validity to fetch the object. Repeat
+downloads in that window skip the storage API. Entries are kept in LRU
+order, with at most SIGNED_URL_CACHE_SIZE of them per worker.
+
+Deletes and moves call forget(), which bumps a counter in shared memory:
+every worker process then re-signs on its next request instead of
+redirecting to a removed or moved path.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from typing import List, Tuple
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import supabase
+
+SIGNED_URL_EXPIRES = int(os.getenv("SIGNED_URL_EXPIRES", "3600"))
+SIGNED_URL_REUSE = float(os.getenv("SIGNED_URL_REUSE", "0.5"))
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "2048"))
+
+
+class SignedUrlCache:
+    """Signed download URLs per (bucket, path), reused until reuse_until"""
+
+    def __init__(
+        self,
+        expires: int = SIGNED_URL_EXPIRES,
+        reuse: float = SIGNED_URL_REUSE,
+        max_entries: int = SIGNED_URL_CACHE_SIZE,
+    ):
+        self.expires = expires
+        self.reuse_for = expires * min(max(reuse, 0.0), 0.9)
+        self.max_entries = max_entries
+        self._urls: "OrderedDict[Tuple[str, str], Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = multiprocessing.Value("L", 0)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket: str, path: str) -> Tuple[str, int]:
+        """
+        (signed URL, seconds it will still be handed out) for an object
+        Blocking on a miss - call through run_in_threadpool from async handlers.
+
+        Raises:
+            LookupError: If storage did not return a URL (e.g. missing object)
+        """
+        key = (bucket, path)
+        now = time.monotonic()
+        generation = self._generation.value
+        with self._lock:
+            entry = self._urls.get(key)
+            if entry and entry[1] > now and entry[2] == generation:
+                self._urls.move_to_end(key)
+                self.hits += 1
+                return entry[0], int(entry[1] - now)
+            self.misses += 1
+
+        signed = supabase.storage.from_(bucket).create_signed_url(path, self.expires)
+        url = signed.get("signedURL") if signed else None
+        if not url:
+            raise LookupError(f"No signed URL for {bucket}/{path}")
+
+        reuse_until = now + self.reuse_for
+        with self._lock:
+            self._urls[key] = (url, reuse_until, generation)
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+        return url, int(self.reuse_for)
+
+    def forget(self, bucket: str, paths: List[str]) -> None:
+        """Stop handing out URLs for removed or moved objects, in every worker process"""
+        with self._generation.get_lock():
+            self._generation.value += 1
+        with self._lock:
+            for path in paths:
+                self._urls.pop((bucket, path), None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._urls), "hits": self.hits, "misses": self.misses}
+
+
+signed_urls = SignedUrlCache()
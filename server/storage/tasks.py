@@ -0,0 +1,76 @@
+"""
+Background jobs for storage
+Registered on the global job queue; enqueued by upload handlers so the
+request returns before cleanup and thumbnail generation run.
+"""
+import os
+import sys
+import logging
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jobs import job_queue
+
+from .images import can_process, build_variants, upload_variants
+from .router import supabase
+from .listing import listing_cache
+from .assets import forget_assets
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+@job_queue.handler("storage.remove")
+def remove_objects(payload: dict):
+    """
+    Remove objects from a bucket
+    Payload: { "bucket": "photos", "paths": ["students/<id>.jpg", ...] }
+    """
+    paths = payload.get("paths") or []
+    if not paths or not supabase:
+        return
+    supabase.storage.from_(payload["bucket"]).remove(paths)
+    listing_cache.invalidate()
+    forget_assets(payload["bucket"], paths)
+    logger.info(f"Removed {len(paths)} object(s) from {payload['bucket']}")
+
+
+@job_queue.handler("photos.generate_variants")
+def generate_photo_variants(payload: dict):
+    """
+    Build thumbnail/WebP/AVIF variants for an uploaded photo and record them on the row
+    Payload: { "bucket", "path", "content_type", "table", "row_id", "stale_paths" }
+
+    Stale paths (old photo and old variants) are removed first so that
+    regenerated variants with the same names are never deleted afterwards.
+    """
+    if not supabase:
+        return
+
+    bucket = supabase.storage.from_(payload["bucket"])
+    stale_paths = [p for p in payload.get("stale_paths") or [] if p != payload["path"]]
+    if stale_paths:
+        try:
+            bucket.remove(stale_paths)
+        except Exception as e:
+            logger.warning(f"Could not delete old photo: {e}")
+        listing_cache.invalidate()
+        forget_assets(payload["bucket"], stale_paths)
+
+    if not can_process(payload.get("content_type")):
+        return
+
+    content = bucket.download(payload["path"])
+    try:
+        variants = build_variants(content)
+    except ValueError as e:
+        # Not retryable - the stored file itself is broken
+        logger.warning(f"Skipping variants for {payload['path']}: {e}")
+        return
+    photo_variants = upload_variants(bucket, payload["path"], variants)
+    listing_cache.invalidate()
+
+    supabase.table(payload["table"]).update({
+        "photo_variants": photo_variants,
+        "updated_at": datetime.utcnow().isoformat()
+    }).eq("id", payload["row_id"]).execute()
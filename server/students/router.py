@@ -9,8 +9,28 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
-from supabase import create_client, Client
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from starlette.concurrency import run_in_threadpool
+
+# Import image processing and background job utilities
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.images import can_process, clean_image, flatten_variant_urls
+from storage.assets import record_asset, uploader
+from admin.auth_utils import get_optional_user, TokenData
+from jobs import job_queue
+from serialization import FastJSONResponse
+from exports import csv_response, iter_keyset
+from bulk import (
+    ImportSummary,
+    LOOKUP_CHUNK_SIZE,
+    add_error,
+    chunked,
+    detect_format,
+    iter_model_rows,
+    validate_rows,
+    write_batches,
+)
 
 from .schemas import (
     StudentCreate,
@@ -22,13 +42,16 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 TABLE_NAME = "students"
 
+EXPORT_COLUMNS = [
+    "id", "name", "roll_no", "class_id", "admission_no", "admission_date",
+    "photo_url", "personal_info", "is_active", "created_at", "updated_at",
+]
+
 students_router = APIRouter(prefix="/api/students", tags=["Students"])
 
 
@@ -38,6 +61,20 @@ def check_supabase():
         raise HTTPException(status_code=503, detail="Database not connected")
 
 
+def apply_student_filters(query, class_id: Optional[str], search: Optional[str], active_only: bool):
+    """Filters shared by the list and export endpoints"""
+    if active_only:
+        query = query.eq("is_active", True)
+    
+    if class_id:
+        query = query.eq("class_id", class_id)
+    
+    if search:
+        query = query.or_(f"name.ilike.%{search}%,roll_no.ilike.%{search}%")
+    
+    return query
+
+
 @students_router.get("", response_model=StudentListResponse)
 async def list_students(
     page: int = Query(1, ge=1),
@@ -56,14 +93,7 @@ async def list_students(
         query = supabase.table(TABLE_NAME).select("*", count="exact")
         
         # Apply filters
-        if active_only:
-            query = query.eq("is_active", True)
-        
-        if class_id:
-            query = query.eq("class_id", class_id)
-        
-        if search:
-            query = query.or_(f"name.ilike.%{search}%,roll_no.ilike.%{search}%")
+        query = apply_student_filters(query, class_id, search, active_only)
         
         # Apply pagination
         offset = (page - 1) * page_size
@@ -74,17 +104,39 @@ async def list_students(
         
         result = query.execute()
         
-        return StudentListResponse(
-            students=result.data,
-            total=result.count or len(result.data),
-            page=page,
-            page_size=page_size
-        )
+        # Rows come straight from PostgREST, so skip re-validating them against StudentListResponse
+        return FastJSONResponse({
+            "students": result.data,
+            "total": result.count or len(result.data),
+            "page": page,
+            "page_size": page_size
+        })
     except Exception as e:
         logger.error(f"Error listing students: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch students: {str(e)}")
 
 
+@students_router.get("/export")
+async def export_students(
+    class_id: Optional[str] = Query(None),
+    search: Optional[str] = None,
+    active_only: bool = True
+):
+    """
+    Export students as CSV (same filters as the list endpoint, no page size cap)
+    """
+    check_supabase()
+    
+    try:
+        rows = iter_keyset(lambda: apply_student_filters(
+            supabase.table(TABLE_NAME).select(",".join(EXPORT_COLUMNS)), class_id, search, active_only
+        ))
+        return csv_response("students", EXPORT_COLUMNS, rows)
+    except Exception as e:
+        logger.error(f"Error exporting students: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to export students: {str(e)}")
+
+
 @students_router.get("/{student_id}", response_model=StudentResponse)
 async def get_student(student_id: UUID):
     """
@@ -98,7 +150,7 @@ async def get_student(student_id: UUID):
         if not result.data:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        return result.data
+        return FastJSONResponse(result.data)
     except HTTPException:
         raise
     except Exception as e:
@@ -221,7 +273,11 @@ async def delete_student(student_id: UUID, hard_delete: bool = False):
 
 
 @students_router.post("/{student_id}/photo")
-async def upload_student_photo(student_id: UUID, file: UploadFile = File(...)):
+async def upload_student_photo(
+    student_id: UUID,
+    file: UploadFile = File(...),
+    current_user: Optional[TokenData] = Depends(get_optional_user)
+):
     """
     Upload a photo for a student
     """
@@ -234,46 +290,153 @@ async def upload_student_photo(student_id: UUID, file: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="Invalid file type. Allowed: JPEG, PNG, WebP")
         
         # Check if student exists
-        existing = supabase.table(TABLE_NAME).select("id, photo_url").eq("id", str(student_id)).single().execute()
+        existing = supabase.table(TABLE_NAME).select("id, photo_url, photo_variants").eq("id", str(student_id)).single().execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        # Delete old photo if exists
+        # Old photo (and its variants) are removed by the background job
         old_photo_url = existing.data.get("photo_url")
-        if old_photo_url:
-            try:
-                old_path = old_photo_url.split("/photos/")[-1] if "/photos/" in old_photo_url else None
-                if old_path:
-                    supabase.storage.from_("photos").remove([old_path])
-            except Exception as del_err:
-                logger.warning(f"Could not delete old photo: {del_err}")
-        
+        old_urls = [old_photo_url] if old_photo_url else []
+        old_urls += flatten_variant_urls(existing.data.get("photo_variants"))
+        # Extract file paths from URLs (e.g., students/uuid.jpg)
+        stale_paths = [url.split("/photos/")[-1] for url in old_urls if "/photos/" in url]
+
         # Read file content
         content = await file.read()
-        
+
+        # Strip EXIF before storing; variants are generated in the background
+        if can_process(file.content_type):
+            try:
+                content = await run_in_threadpool(clean_image, content, file.content_type)
+            except ValueError as img_err:
+                raise HTTPException(status_code=400, detail=str(img_err))
+
         # Upload to Supabase Storage
         file_ext = file.filename.split(".")[-1] if file.filename else "jpg"
         file_path = f"students/{student_id}.{file_ext}"
-        
+
         # Upload file
-        supabase.storage.from_("photos").upload(
+        bucket = supabase.storage.from_("photos")
+        bucket.upload(
             file_path,
             content,
             {"content-type": file.content_type, "upsert": "true"}
         )
-        
+
         # Get public URL
-        public_url = supabase.storage.from_("photos").get_public_url(file_path)
-        
+        public_url = bucket.get_public_url(file_path)
+
         # Update student record with photo URL
         supabase.table(TABLE_NAME).update({
             "photo_url": public_url,
+            "photo_variants": None,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", str(student_id)).execute()
-        
-        return {"message": "Photo uploaded successfully", "photo_url": public_url}
+
+        # Cleanup + thumbnail/WebP/AVIF generation and indexing happen after the response
+        record_asset("photos", file_path, content, file.content_type, uploaded_by=uploader(current_user), source="student_photo")
+        job_queue.enqueue("photos.generate_variants", {
+            "bucket": "photos",
+            "path": file_path,
+            "content_type": file.content_type,
+            "table": TABLE_NAME,
+            "row_id": str(student_id),
+            "stale_paths": stale_paths,
+        })
+
+        return {"message": "Photo uploaded successfully", "photo_url": public_url, "variants_pending": can_process(file.content_type)}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error uploading photo: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload photo: {str(e)}")
+
+
+def _import_students(file: UploadFile, fmt: str, dry_run: bool) -> ImportSummary:
+    """Validate, de-duplicate and batch insert students (runs in a worker thread)"""
+    summary = ImportSummary(total=0, dry_run=dry_run)
+    rows = iter_model_rows(file, fmt, StudentCreate, extras_field="personal_info")
+    valid = validate_rows(rows, StudentCreate, summary, key_field="roll_no")
+    
+    # Duplicates within the file itself (roll_no is unique across all classes)
+    seen = set()
+    unique = []
+    for row_number, student in valid:
+        if student.roll_no in seen:
+            add_error(summary, row_number, student.roll_no, "Duplicate roll number in file")
+            continue
+        seen.add(student.roll_no)
+        unique.append((row_number, student))
+    
+    class_ids = sorted({str(student.class_id) for _, student in unique})
+    roll_nos = sorted({student.roll_no for _, student in unique})
+    
+    # Referenced classes must exist (one query per chunk of ids)
+    known_classes = set()
+    for ids in chunked(class_ids, LOOKUP_CHUNK_SIZE):
+        result = supabase.table("classes").select("id").in_("id", ids).execute()
+        known_classes.update(row["id"] for row in result.data)
+    
+    # Existing roll numbers (in any class) in one set-based query per chunk
+    existing = set()
+    for rolls in chunked(roll_nos, LOOKUP_CHUNK_SIZE):
+        result = supabase.table(TABLE_NAME).select("roll_no").in_("roll_no", rolls).execute()
+        existing.update(row["roll_no"] for row in result.data)
+    
+    now = datetime.utcnow().isoformat()
+    records = []
+    for row_number, student in unique:
+        class_id = str(student.class_id)
+        if class_id not in known_classes:
+            add_error(summary, row_number, student.roll_no, f"Class {class_id} not found")
+            continue
+        if student.roll_no in existing:
+            add_error(summary, row_number, student.roll_no, "Roll number already exists", skipped=True)
+            continue
+        
+        data = student.model_dump(by_alias=False, exclude_none=True)
+        data["class_id"] = class_id
+        if data.get("admission_date"):
+            data["admission_date"] = data["admission_date"].isoformat()
+        data["id"] = str(uuid.uuid4())
+        data["created_at"] = now
+        data["updated_at"] = now
+        data["is_active"] = True
+        records.append((row_number, student.roll_no, data))
+    
+    if dry_run:
+        summary.created = len(records)
+    else:
+        write_batches(supabase.table(TABLE_NAME), records, summary)
+    
+    summary.errors.sort(key=lambda e: e.row)
+    return summary
+
+
+@students_router.post("/import", response_model=ImportSummary)
+async def import_students(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson (detected from the file if omitted)"),
+    dry_run: bool = False
+):
+    """
+    Bulk import students from a CSV or NDJSON file
+    
+    Rows are validated against StudentCreate; unknown columns are stored in personal_info.
+    Existing roll numbers (unique across all classes) are skipped and reported, valid rows are inserted
+    in batches. Use dry_run=true to validate without writing.
+    """
+    check_supabase()
+    fmt = detect_format(file, format)
+    
+    try:
+        summary = await run_in_threadpool(_import_students, file, fmt, dry_run)
+        logger.info(f"Student import: {summary.created} created, {summary.skipped} skipped, {summary.failed} failed of {summary.total}")
+        return summary
+    except HTTPException:
+        raise
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except Exception as e:
+        logger.error(f"Error importing students: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to import students: {str(e)}")
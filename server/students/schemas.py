@@ -91,6 +91,7 @@ class StudentResponse(BaseModel):
     admission_no: Optional[str] = None
     admission_date: Optional[date] = None
     photo_url: Optional[str] = None
+    photo_variants: Optional[Dict[str, Any]] = None  # thumbnail + WebP/AVIF widths
     personal_info: Optional[Dict[str, Any]] = None
     is_active: bool = True
     created_at: datetime
@@ -9,8 +9,27 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
-from supabase import create_client, Client
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from starlette.concurrency import run_in_threadpool
+
+# Import image processing and background job utilities
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.images import can_process, clean_image, flatten_variant_urls
+from storage.assets import record_asset, uploader
+from admin.auth_utils import get_optional_user, TokenData
+from jobs import job_queue
+from serialization import FastJSONResponse
+from bulk import (
+    ImportSummary,
+    LOOKUP_CHUNK_SIZE,
+    add_error,
+    chunked,
+    detect_format,
+    iter_model_rows,
+    validate_rows,
+    write_batches,
+)
 
 from .schemas import (
     TeacherCreate,
@@ -22,10 +41,8 @@ from .schemas import (
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Shared Supabase client (created on first use, see db.py)
+from db import supabase
 
 TABLE_NAME = "teachers"
 
@@ -74,12 +91,13 @@ async def list_teachers(
         
         result = query.execute()
         
-        return TeacherListResponse(
-            teachers=result.data,
-            total=result.count or len(result.data),
-            page=page,
-            page_size=page_size
-        )
+        # Rows come straight from PostgREST, so skip re-validating them against TeacherListResponse
+        return FastJSONResponse({
+            "teachers": result.data,
+            "total": result.count or len(result.data),
+            "page": page,
+            "page_size": page_size
+        })
     except Exception as e:
         logger.error(f"Error listing teachers: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch teachers")
@@ -98,7 +116,7 @@ async def get_teacher(teacher_id: UUID):
         if not result.data:
             raise HTTPException(status_code=404, detail="Teacher not found")
         
-        return result.data
+        return FastJSONResponse(result.data)
     except HTTPException:
         raise
     except Exception as e:
@@ -214,7 +232,11 @@ async def delete_teacher(teacher_id: UUID, hard_delete: bool = False):
 
 
 @teachers_router.post("/{teacher_id}/photo")
-async def upload_teacher_photo(teacher_id: UUID, file: UploadFile = File(...)):
+async def upload_teacher_photo(
+    teacher_id: UUID,
+    file: UploadFile = File(...),
+    current_user: Optional[TokenData] = Depends(get_optional_user)
+):
     """
     Upload a photo for a teacher
     """
@@ -227,51 +249,148 @@ async def upload_teacher_photo(teacher_id: UUID, file: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="Invalid file type. Allowed: JPEG, PNG, WebP")
         
         # Check if teacher exists and get current photo
-        existing = supabase.table(TABLE_NAME).select("id, photo_url").eq("id", str(teacher_id)).single().execute()
+        existing = supabase.table(TABLE_NAME).select("id, photo_url, photo_variants").eq("id", str(teacher_id)).single().execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Teacher not found")
         
-        # Delete old photo if exists
+        # Old photo (and its variants) are removed by the background job
         old_photo_url = existing.data.get("photo_url")
-        if old_photo_url:
-            try:
-                # Extract file path from URL (e.g., teachers/uuid.jpg)
-                old_path = old_photo_url.split("/photos/")[-1] if "/photos/" in old_photo_url else None
-                if old_path:
-                    supabase.storage.from_("photos").remove([old_path])
-            except Exception as del_err:
-                logger.warning(f"Could not delete old photo: {del_err}")
-        
+        old_urls = [old_photo_url] if old_photo_url else []
+        old_urls += flatten_variant_urls(existing.data.get("photo_variants"))
+        # Extract file paths from URLs (e.g., teachers/uuid.jpg)
+        stale_paths = [url.split("/photos/")[-1] for url in old_urls if "/photos/" in url]
+
         # Read file content
         content = await file.read()
-        
+
+        # Strip EXIF before storing; variants are generated in the background
+        if can_process(file.content_type):
+            try:
+                content = await run_in_threadpool(clean_image, content, file.content_type)
+            except ValueError as img_err:
+                raise HTTPException(status_code=400, detail=str(img_err))
+
         # Upload to Supabase Storage
         file_ext = file.filename.split(".")[-1] if file.filename else "jpg"
         file_path = f"teachers/{teacher_id}.{file_ext}"
-        
+
         # Upload file (upsert = overwrite if exists)
-        supabase.storage.from_("photos").upload(
+        bucket = supabase.storage.from_("photos")
+        bucket.upload(
             file_path,
             content,
             {"content-type": file.content_type, "upsert": "true"}
         )
-        
+
         # Get public URL
-        public_url = supabase.storage.from_("photos").get_public_url(file_path)
-        
+        public_url = bucket.get_public_url(file_path)
+
         # Update teacher record with photo URL
         result = supabase.table(TABLE_NAME).update({
             "photo_url": public_url,
+            "photo_variants": None,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", str(teacher_id)).execute()
-        
+
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update teacher record")
-        
-        return {"message": "Photo uploaded successfully", "photo_url": public_url}
+
+        # Cleanup + thumbnail/WebP/AVIF generation and indexing happen after the response
+        record_asset("photos", file_path, content, file.content_type, uploaded_by=uploader(current_user), source="teacher_photo")
+        job_queue.enqueue("photos.generate_variants", {
+            "bucket": "photos",
+            "path": file_path,
+            "content_type": file.content_type,
+            "table": TABLE_NAME,
+            "row_id": str(teacher_id),
+            "stale_paths": stale_paths,
+        })
+
+        return {"message": "Photo uploaded successfully", "photo_url": public_url, "variants_pending": can_process(file.content_type)}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error uploading photo: {e}")
         raise HTTPException(status_code=500, detail="Failed to upload photo")
 
+
+def _import_teachers(file: UploadFile, fmt: str, update_existing: bool, dry_run: bool) -> ImportSummary:
+    """Validate the whole file, then upsert teachers on employee_id in chunks (runs in a worker thread)"""
+    summary = ImportSummary(total=0, dry_run=dry_run)
+    rows = iter_model_rows(file, fmt, TeacherCreate, extras_field="personal_info")
+    valid = validate_rows(rows, TeacherCreate, summary, key_field="employee_id")
+    
+    # Last row wins for repeated employee IDs within the file
+    by_employee_id = {}
+    for row_number, teacher in valid:
+        if teacher.employee_id in by_employee_id:
+            add_error(summary, by_employee_id[teacher.employee_id][0], teacher.employee_id,
+                      f"Superseded by row {row_number} with the same employee ID", skipped=True)
+        by_employee_id[teacher.employee_id] = (row_number, teacher)
+    
+    # Resolve existing teachers in one query per chunk
+    existing_ids = {}
+    for employee_ids in chunked(sorted(by_employee_id), LOOKUP_CHUNK_SIZE):
+        result = supabase.table(TABLE_NAME).select("id, employee_id").in_("employee_id", employee_ids).execute()
+        existing_ids.update({row["employee_id"]: row["id"] for row in result.data})
+    
+    now = datetime.utcnow().isoformat()
+    new_records, update_records = [], []
+    for employee_id, (row_number, teacher) in by_employee_id.items():
+        data = teacher.model_dump(by_alias=False, exclude_none=True)
+        if data.get("join_date"):
+            data["join_date"] = data["join_date"].isoformat()
+        data["updated_at"] = now
+        data["is_active"] = True
+        
+        if employee_id in existing_ids:
+            if not update_existing:
+                add_error(summary, row_number, employee_id, "Employee ID already exists", skipped=True)
+                continue
+            data["id"] = existing_ids[employee_id]
+            update_records.append((row_number, employee_id, data))
+        else:
+            data["id"] = str(uuid.uuid4())
+            data["created_at"] = now
+            new_records.append((row_number, employee_id, data))
+    
+    if dry_run:
+        summary.created = len(new_records)
+        summary.updated = len(update_records)
+    else:
+        table = supabase.table(TABLE_NAME)
+        write_batches(table, new_records, summary, on_conflict="employee_id")
+        write_batches(table, update_records, summary, on_conflict="employee_id", counter="updated")
+    
+    summary.errors.sort(key=lambda e: e.row)
+    return summary
+
+
+@teachers_router.post("/import", response_model=ImportSummary)
+async def import_teachers(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson (detected from the file if omitted)"),
+    update_existing: bool = True,
+    dry_run: bool = False
+):
+    """
+    Bulk import teachers from a CSV or NDJSON file
+    
+    Rows are validated against TeacherCreate; unknown columns are stored in personal_info.
+    Teachers are upserted on employee_id in batches - existing ones are updated
+    (or skipped with update_existing=false). Use dry_run=true to validate without writing.
+    """
+    check_supabase()
+    fmt = detect_format(file, format)
+    
+    try:
+        summary = await run_in_threadpool(_import_teachers, file, fmt, update_existing, dry_run)
+        logger.info(f"Teacher import: {summary.created} created, {summary.updated} updated, {summary.skipped} skipped, {summary.failed} failed of {summary.total}")
+        return summary
+    except HTTPException:
+        raise
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except Exception as e:
+        logger.error(f"Error importing teachers: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import teachers")
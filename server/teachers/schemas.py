@@ -57,6 +57,7 @@ class TeacherUpdate(BaseModel):
 class TeacherResponse(TeacherBase):
     """Schema for teacher response"""
     id: UUID
+    photo_variants: Optional[Dict[str, Any]] = None  # thumbnail + WebP/AVIF widths
     is_active: bool = True
     created_at: datetime
     updated_at: datetime